@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Prometheus /metrics for the archive batch scripts, which have no --metrics-port of their own.
+
+    python3 scripts/archive_metrics.py --metrics-port 9531 scripts/archive/translate_vin02m1_trans_batches.py --items 20
+
+The script runs in this process (like profiling.py) with its helpers wrapped: the target
+selection sizes the progress tracker, each top-level run_*_translate_batch call is one batch,
+each _run_*_once call is one backend call, and time.sleep feeds the throttle/backoff counters.
+Items are text slots, the unit the backend translates.
+"""
+import argparse
+import re
+import runpy
+import sys
+import time
+import types
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from metrics_server import DEFAULT_METRICS_LINGER, TranslationMetrics, serve_metrics
+from progress_tracker import ProgressTracker
+
+
+BATCH_FN_RE = re.compile(r"^run_\w+_translate_batch$")
+CALL_FN_RE = re.compile(r"^_run_\w+_(list|single)_once$")
+
+
+class _SleepClock:
+    """Stands in for the script's `time` module; sleep() is counted, the rest is passed through."""
+
+    def __init__(self, live):
+        self._live = live
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+        self._live.add_sleep(seconds)
+
+
+def slot_texts(raw, collect_text_slots):
+    try:
+        elem = ET.fromstring(raw.strip())
+    except ET.ParseError:
+        return []
+    return [node.text if kind == "text" else node.tail for node, kind in collect_text_slots(elem)]
+
+
+def instrument(g, live):
+    """Wrap the helpers in the script's globals `g` so main() reports to `live`."""
+    file_name = Path(g["TARGET_XML"]).name
+    state = {"tracker": None, "calls": 0}
+
+    def recording_parser(cls):
+        class Parser(cls):
+            def parse_args(self, *args, **kwargs):
+                ns = super().parse_args(*args, **kwargs)
+                live.model = getattr(ns, "model", "") or ""
+                if getattr(ns, "sleep_seconds", None) is not None:
+                    live.set_throttle(ns.sleep_seconds)
+                return ns
+
+        return Parser
+
+    argparse_mod = g["argparse"]
+    g["argparse"] = types.SimpleNamespace(**{**vars(argparse_mod), "ArgumentParser": recording_parser(argparse_mod.ArgumentParser)})
+    g["time"] = _SleepClock(live)
+
+    find_targets = g["find_target_lines"]
+
+    def find_target_lines(lines, start_line, limit):
+        targets = find_targets(lines, start_line, limit)
+        texts = [t for ln in targets for t in slot_texts(lines[ln - 1], g["collect_text_slots"])]
+        state["tracker"] = ProgressTracker(len(texts), sum(len(t) for t in texts))
+        live.add_file(file_name, state["tracker"])
+        return targets
+
+    g["find_target_lines"] = find_target_lines
+
+    for name in [n for n in g if CALL_FN_RE.match(n)]:
+        def call(*args, _fn=g[name], **kwargs):
+            state["calls"] += 1
+            try:
+                return _fn(*args, **kwargs)
+            except Exception:
+                live.backend_failed()
+                raise
+
+        g[name] = call
+
+    for name in [n for n in g if BATCH_FN_RE.match(n)]:
+        def batch(texts, *args, _fn=g[name], **kwargs):
+            # (texts, model, bin, depth, max_depth): depth > 0 is the script's own split fallback.
+            depth = args[2] if len(args) > 2 else kwargs.get("depth", 0)
+            if depth:
+                return _fn(texts, *args, **kwargs)
+            calls_before = state["calls"]
+            live.batch_started()
+            try:
+                out = _fn(texts, *args, **kwargs)
+            except Exception:
+                live.batch_failed()
+                raise
+            if state["tracker"] is not None:
+                state["tracker"].record(len(texts), sum(len(t) for t in texts))
+            live.batch_finished(retries=max(state["calls"] - calls_before - 1, 0))
+            return out
+
+        g[name] = batch
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run an archive batch script (scripts/archive/translate_*_trans_batches.py) with a Prometheus /metrics endpoint."
+    )
+    parser.add_argument("--metrics-port", type=int, default=9531, help="Port for GET /metrics")
+    parser.add_argument("--metrics-bind", default="127.0.0.1", help="Bind address")
+    parser.add_argument(
+        "--metrics-linger",
+        type=float,
+        default=DEFAULT_METRICS_LINGER,
+        help="Keep serving this many seconds after the script fails",
+    )
+    parser.add_argument("script", help="Archive script path")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Script arguments")
+    args = parser.parse_args()
+
+    script = Path(args.script)
+    sys.argv = [str(script), *args.args]
+    sys.path.insert(0, str(script.resolve().parent))
+    # run_path returns a copy of the module globals; main() looks names up in the original.
+    g = runpy.run_path(str(script), run_name="archive_script")["main"].__globals__
+    live = TranslationMetrics()
+    instrument(g, live)
+    serve_metrics(live, args.metrics_port, args.metrics_bind)
+    print(f"metrics: http://{args.metrics_bind}:{args.metrics_port}/metrics", file=sys.stderr)
+
+    failure = None
+    try:
+        g["main"]()
+    except (Exception, SystemExit) as exc:
+        failure = exc
+        if not isinstance(exc, SystemExit):
+            print(f"ERROR: {exc}", file=sys.stderr)
+    live.finish()
+    failed = failure is not None and not (isinstance(failure, SystemExit) and failure.code in (0, None))
+    if failed and args.metrics_linger > 0:
+        print(f"metrics: serving final values for {args.metrics_linger:g}s", file=sys.stderr)
+        try:
+            time.sleep(args.metrics_linger)
+        except KeyboardInterrupt:
+            pass
+    if isinstance(failure, SystemExit):
+        raise failure
+    if failure is not None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
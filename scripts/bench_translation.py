@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parent
+ROMN_DIR = ROOT_DIR / "data/corpus/romn"
+DEFAULT_FILES = ["vin01m.mul.xml", "s0101m.mul.xml", "vin11t.nrf.xml"]
+ENGINES = ("codex", "archive")
+# Any archive/translate_*_trans_batches.py works: they differ only in TARGET_XML, which the bench replaces.
+ARCHIVE_MODULE = "translate_vin01_trans_batches"
+STAGES = ("planning", "batching", "backend", "checkpoint", "write")
+
+
+def sample_latency(spec, rng):
+    """fixed:S | uniform:A,B | normal:MEAN,SD | lognormal:MEDIAN,SIGMA | exp:MEAN (seconds)."""
+    kind, _, params = spec.partition(":")
+    vals = [float(x) for x in params.split(",") if x.strip()]
+    if kind == "fixed" and len(vals) == 1:
+        return max(vals[0], 0.0)
+    if kind == "uniform" and len(vals) == 2:
+        return rng.uniform(vals[0], vals[1])
+    if kind == "normal" and len(vals) == 2:
+        return max(rng.gauss(vals[0], vals[1]), 0.0)
+    if kind == "lognormal" and len(vals) == 2:
+        return vals[0] * rng.lognormvariate(0.0, vals[1])
+    if kind == "exp" and len(vals) == 1:
+        return rng.expovariate(1.0 / vals[0]) if vals[0] > 0 else 0.0
+    raise ValueError(f"bad latency spec: {spec!r}")
+
+
+def fake_codex_main():
+    # Stands in for `codex exec ... --output-schema S --output-last-message O -`: echoes the prompt's
+    # JSON payload back after a simulated delay, so both engines run their real subprocess path.
+    argv = sys.argv[1:]
+    schema = json.loads(Path(argv[argv.index("--output-schema") + 1]).read_text(encoding="utf-8"))
+    out_path = Path(argv[argv.index("--output-last-message") + 1])
+    prompt = sys.stdin.read()
+    payload = json.loads(prompt.rsplit("\n\n", 1)[-1])
+    texts = payload if isinstance(payload, list) else [payload]
+
+    rng = random.Random(f"{os.environ.get('BENCH_SEED', '0')}:{hashlib.sha1(prompt.encode('utf-8')).hexdigest()}")
+    chars = sum(len(t) for t in texts)
+    delay = sample_latency(os.environ.get("BENCH_LATENCY", "fixed:0"), rng)
+    delay += float(os.environ.get("BENCH_PER_KCHAR", "0")) * chars / 1000.0
+    time.sleep(delay)
+    log = os.environ.get("BENCH_LATENCY_LOG")
+    if log:
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(f"{delay:.6f}\n")
+
+    out = [f"ko:{t}" for t in texts]
+    if len(out) > 1 and rng.random() < float(os.environ.get("BENCH_MISMATCH", "0")):
+        out = out[:-1]
+    if "translations" in schema.get("properties", {}):
+        out_path.write_text(json.dumps({"translations": out}, ensure_ascii=False), encoding="utf-8")
+    else:
+        out_path.write_text(json.dumps({"translation": out[0]}, ensure_ascii=False), encoding="utf-8")
+
+
+class StageTimer:
+    """Wall time per stage for wrapped engine functions; only the outermost wrapped call is counted."""
+
+    def __init__(self):
+        self.stats = {s: {"calls": 0, "seconds": 0.0} for s in STAGES}
+        self.active = None
+
+    def wrap(self, obj, name, stage, after=None):
+        orig = getattr(obj, name)
+
+        def wrapper(*args, **kwargs):
+            if self.active is not None:
+                return orig(*args, **kwargs)
+            self.active = stage
+            started = time.perf_counter()
+            try:
+                return orig(*args, **kwargs)
+            finally:
+                self.stats[stage]["calls"] += 1
+                self.stats[stage]["seconds"] += time.perf_counter() - started
+                self.active = None
+                if after:
+                    after(args, kwargs)
+
+        setattr(obj, name, wrapper)
+
+
+def rusage_self():
+    # (CPU seconds, peak RSS KB). Linux keeps ru_maxrss across exec, so it would report the parent's
+    # peak; VmHWM belongs to this process image alone.
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    peak = ru.ru_maxrss
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                peak = int(line.split()[1])
+    except OSError:
+        pass
+    return ru.ru_utime + ru.ru_stime, peak
+
+
+def run_codex_case(case, timer, counters):
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    import translate_one_xml_with_codex as eng
+
+    work = Path(case["work"])
+    out_path = work / "out.xml"
+
+    def count_backend(args, kwargs):
+        counters["batches"] += 1
+        counters["items"] += len(args[0])
+
+    def count_state(args, kwargs):
+        counters["checkpoint_bytes"] += args[0].stat().st_size
+        counters["checkpoints"] += 1
+
+    def count_partial(args, kwargs):
+        path = args[5]
+        counters["checkpoint_bytes"] += path.with_suffix(path.suffix + ".partial").stat().st_size
+
+    minidom_shim = SimpleNamespace(parseString=eng.minidom.parseString)
+    timer.wrap(minidom_shim, "parseString", "planning")
+    eng.minidom = minidom_shim
+    for name in ("decode_xml_bytes", "collect_text_nodes", "build_translation_items"):
+        timer.wrap(eng, name, "planning")
+    for name in ("build_batches", "build_node_item_ids"):
+        timer.wrap(eng, name, "batching")
+    timer.wrap(eng, "run_codex_translate_batch", "backend", count_backend)
+    timer.wrap(eng, "save_state", "checkpoint", count_state)
+    timer.wrap(eng, "write_partial_output", "checkpoint", count_partial)
+    timer.wrap(eng, "write_final_output", "write")
+
+    sys.argv = [
+        "translate_one_xml_with_codex.py",
+        "--input", case["input"],
+        "--output", str(out_path),
+        "--max-batch-chars", str(case["max_batch_chars"]),
+        "--no-resume",
+    ]
+    eng.main()
+
+
+def run_archive_case(case, timer, counters):
+    sys.path.insert(0, str(SCRIPTS_DIR / "archive"))
+    eng = __import__(ARCHIVE_MODULE)
+
+    class CountingPath(type(Path())):
+        # The archive flow rewrites the whole target file after every batch: that is its checkpoint.
+        def write_text(self, data, *args, **kwargs):
+            started = time.perf_counter()
+            n = super().write_text(data, *args, **kwargs)
+            timer.stats["checkpoint"]["calls"] += 1
+            timer.stats["checkpoint"]["seconds"] += time.perf_counter() - started
+            counters["checkpoint_bytes"] += len(data.encode("utf-8"))
+            counters["checkpoints"] += 1
+            return n
+
+    def count_backend(args, kwargs):
+        counters["batches"] += 1
+        counters["items"] += len(args[0])
+
+    et_shim = SimpleNamespace(
+        fromstring=eng.ET.fromstring,
+        tostring=eng.ET.tostring,
+        Element=eng.ET.Element,
+        ParseError=eng.ET.ParseError,
+    )
+    timer.wrap(et_shim, "fromstring", "batching")
+    timer.wrap(et_shim, "tostring", "write")
+    eng.ET = et_shim
+    eng.TARGET_XML = CountingPath(case["input"])
+    for name in ("find_target_lines", "is_trans_false_target_line"):
+        timer.wrap(eng, name, "planning")
+    timer.wrap(eng, "collect_text_slots", "batching")
+    timer.wrap(eng, "run_codex_translate_batch", "backend", count_backend)
+    timer.wrap(eng, "set_trans_true", "write")
+
+    sys.argv = [
+        f"{ARCHIVE_MODULE}.py",
+        "--items", str(case["archive_items"]),
+        "--batch-size", str(case["archive_batch_size"]),
+        "--sleep-seconds", "0",
+        "--model", "mock",
+    ]
+    eng.main()
+
+
+def run_worker(case):
+    # One case per process, so CPU time and peak RSS belong to that engine run alone.
+    # The fake backend runs as a child process and is not included in either.
+    cpu0, rss0 = rusage_self()
+    timer = StageTimer()
+    counters = {"items": 0, "batches": 0, "checkpoints": 0, "checkpoint_bytes": 0}
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            if case["engine"] == "codex":
+                run_codex_case(case, timer, counters)
+            else:
+                run_archive_case(case, timer, counters)
+        finally:
+            sys.stdout = stdout
+    wall = time.perf_counter() - started
+    cpu1, rss1 = rusage_self()
+
+    latency_log = Path(case["latency_log"])
+    delays = [float(x) for x in latency_log.read_text().split()] if latency_log.exists() else []
+    simulated = sum(delays)
+    items = counters["items"]
+    cpu = cpu1 - cpu0
+    staged = sum(s["seconds"] for s in timer.stats.values())
+    result = {
+        "engine": case["engine"],
+        "file": case["file"],
+        **counters,
+        "backend_calls": len(delays),
+        "wall_s": round(wall, 4),
+        "items_per_sec": round(items / wall, 2) if wall > 0 else None,
+        "engine_cpu_s": round(cpu, 4),
+        "engine_cpu_ms_per_item": round(cpu * 1000 / items, 4) if items else None,
+        "simulated_latency_s": round(simulated, 4),
+        "overhead_s": round(wall - simulated, 4),
+        "peak_rss_kb": rss1,
+        "baseline_rss_kb": rss0,
+        "stages": {
+            name: {"calls": s["calls"], "seconds": round(s["seconds"], 4)} for name, s in timer.stats.items()
+        },
+        "unstaged_s": round(wall - staged, 4),
+    }
+    Path(case["result"]).write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+
+
+def prepare_input(file_name, engine, work, trim):
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    from xml.dom import minidom
+
+    from translate_one_xml_with_codex import decode_xml_bytes, encode_xml_text
+
+    raw = (ROMN_DIR / file_name).read_bytes()
+    text, enc = decode_xml_bytes(raw)
+    # The utf-16 decoders keep the BOM as U+FEFF; encode_xml_text adds its own.
+    text = text.lstrip("\ufeff")
+    if trim:
+        dom = minidom.parseString(text)
+        for node in dom.getElementsByTagName("p")[trim:]:
+            node.parentNode.removeChild(node)
+        text = dom.toxml()
+    path = work / file_name
+    if engine == "codex":
+        path.write_bytes(encode_xml_text(text, enc) if trim else raw)
+    else:
+        # The archive flow reads its ko target as UTF-8, one element per line.
+        path.write_text(text, encoding="utf-8")
+    return path
+
+
+def git_head():
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True)
+        return proc.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the translation engines end to end against a simulated codex backend; prints JSON."
+    )
+    parser.add_argument("--file", action="append", default=[], help=f"romn file (repeatable, default {', '.join(DEFAULT_FILES)})")
+    parser.add_argument("--engine", action="append", default=[], choices=ENGINES, help="Engine (repeatable, default both)")
+    parser.add_argument("--latency", default="fixed:0", help="Backend latency per call: fixed:S, uniform:A,B, normal:MEAN,SD, lognormal:MEDIAN,SIGMA, exp:MEAN")
+    parser.add_argument("--per-kchar", type=float, default=0.0, help="Extra backend seconds per 1000 input chars")
+    parser.add_argument("--mismatch-rate", type=float, default=0.0, help="Probability a batch answer drops one item (exercises split retries)")
+    parser.add_argument("--seed", default="1", help="Seed for the latency and mismatch draws")
+    parser.add_argument("--max-batch-chars", type=int, default=5000, help="codex engine --max-batch-chars")
+    parser.add_argument("--archive-items", type=int, default=200, help="archive engine --items")
+    parser.add_argument("--archive-batch-size", type=int, default=5, help="archive engine --batch-size")
+    parser.add_argument("--trim", type=int, default=0, help="Keep only the first N <p> of each file (0 = whole file)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case")
+    parser.add_argument("--out", default="", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--worker", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(json.loads(args.worker))
+        return
+
+    sample_latency(args.latency, random.Random(0))
+    files = args.file or DEFAULT_FILES
+    engines = args.engine or list(ENGINES)
+    for name in files:
+        if not (ROMN_DIR / name).exists():
+            raise FileNotFoundError(f"romn file not found: {name}")
+
+    with tempfile.TemporaryDirectory(prefix="bench-translation-") as td:
+        tmp = Path(td)
+        bin_dir = tmp / "bin"
+        bin_dir.mkdir()
+        fake = bin_dir / "codex"
+        fake.write_text(
+            f"#!{sys.executable}\nimport sys\nsys.path.insert(0, {str(SCRIPTS_DIR)!r})\n"
+            "from bench_translation import fake_codex_main\nfake_codex_main()\n",
+            encoding="utf-8",
+        )
+        fake.chmod(0o755)
+
+        cases = []
+        for engine in engines:
+            for name in files:
+                for run in range(1, max(args.repeat, 1) + 1):
+                    work = tmp / f"{engine}-{name}-{run}"
+                    work.mkdir()
+                    case = {
+                        "engine": engine,
+                        "file": name,
+                        "work": str(work),
+                        "input": str(prepare_input(name, engine, work, args.trim)),
+                        "max_batch_chars": args.max_batch_chars,
+                        "archive_items": args.archive_items,
+                        "archive_batch_size": args.archive_batch_size,
+                        "latency_log": str(work / "latency.log"),
+                        "result": str(work / "result.json"),
+                    }
+                    env = {
+                        **os.environ,
+                        "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+                        "BENCH_LATENCY": args.latency,
+                        "BENCH_PER_KCHAR": str(args.per_kchar),
+                        "BENCH_MISMATCH": str(args.mismatch_rate),
+                        "BENCH_SEED": args.seed,
+                        "BENCH_LATENCY_LOG": case["latency_log"],
+                    }
+                    print(f"[{engine}] {name} run {run} ...", file=sys.stderr, flush=True)
+                    proc = subprocess.run(
+                        [sys.executable, str(Path(__file__).resolve()), "--worker", json.dumps(case)],
+                        env=env,
+                        capture_output=True,
+                        text=True,
+                    )
+                    if proc.returncode != 0:
+                        raise RuntimeError(f"{engine} {name} failed:\n{proc.stderr[-2000:]}")
+                    result = json.loads(Path(case["result"]).read_text(encoding="utf-8"))
+                    result["run"] = run
+                    cases.append(result)
+                    print(
+                        f"  items={result['items']} {result['items_per_sec']} items/s "
+                        f"cpu/item={result['engine_cpu_ms_per_item']}ms rss={result['peak_rss_kb']}KB",
+                        file=sys.stderr,
+                    )
+
+    report = {
+        "v": 1,
+        "created": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "commit": git_head(),
+        "python": sys.version.split()[0],
+        "backend": {
+            "latency": args.latency,
+            "per_kchar": args.per_kchar,
+            "mismatch_rate": args.mismatch_rate,
+            "seed": args.seed,
+        },
+        "config": {
+            "max_batch_chars": args.max_batch_chars,
+            "archive_items": args.archive_items,
+            "archive_batch_size": args.archive_batch_size,
+            "trim": args.trim,
+        },
+        "cases": cases,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"written: {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
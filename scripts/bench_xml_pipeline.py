@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from xml.dom import minidom
+
+from corpus_blocks import ROMN_DIR, default_jobs, list_romn_files
+from translate_one_xml_with_codex import (
+    build_translation_items,
+    collect_text_nodes,
+    decode_xml_bytes,
+    encode_xml_text,
+)
+
+
+STAGES = ("decode", "parse", "collect", "items", "toxml", "encode")
+STAGE_LABELS = {
+    "decode": "decode_xml_bytes",
+    "parse": "minidom.parseString",
+    "collect": "collect_text_nodes",
+    "items": "build_translation_items",
+    "toxml": "dom.toxml()",
+    "encode": "encode_xml_text",
+}
+
+
+def time_file(file_name, max_batch_chars, repeat):
+    # Best of `repeat` runs per stage, in the order translate_one_xml_with_codex.py runs them.
+    raw = (ROMN_DIR / file_name).read_bytes()
+    best = {s: float("inf") for s in STAGES}
+    counts = {}
+    for _ in range(max(repeat, 1)):
+        t0 = time.perf_counter()
+        text, enc = decode_xml_bytes(raw)
+        t1 = time.perf_counter()
+        dom = minidom.parseString(text)
+        t2 = time.perf_counter()
+        nodes = []
+        collect_text_nodes(dom, nodes)
+        t3 = time.perf_counter()
+        items = build_translation_items([n.data for n in nodes], max_batch_chars)
+        t4 = time.perf_counter()
+        rendered = dom.toxml()
+        t5 = time.perf_counter()
+        out = encode_xml_text(rendered, enc)
+        t6 = time.perf_counter()
+        for stage, seconds in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4, t6 - t5)):
+            best[stage] = min(best[stage], seconds)
+        counts = {"bytes": len(raw), "enc": enc, "nodes": len(nodes), "items": len(items), "out_bytes": len(out)}
+        dom.unlink()
+    return {"file": file_name, **counts, "stages": best, "total": sum(best.values())}
+
+
+def _time_job(job):
+    return time_file(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time each XML stage of translate_one_xml_with_codex.py (decode, parse, collect, items, toxml, encode) over the romn corpus."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    parser.add_argument("--file", action="append", default=[], help="Only this romn file (repeatable)")
+    parser.add_argument("--max-batch-chars", type=int, default=5000, help="build_translation_items limit")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per file; the fastest run of each stage is kept")
+    parser.add_argument("--top", type=int, default=10, help="Slowest files to list")
+    parser.add_argument("--json", default="", help="Also write per-file results as JSON")
+    args = parser.parse_args()
+
+    names = args.file or list_romn_files()
+    for name in names:
+        if not (ROMN_DIR / name).exists():
+            raise FileNotFoundError(f"romn file not found: {name}")
+
+    started = time.time()
+    results = []
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        jobs = [(n, args.max_batch_chars, args.repeat) for n in names]
+        for res in pool.map(_time_job, jobs):
+            results.append(res)
+    wall = time.time() - started
+
+    totals = {s: sum(r["stages"][s] for r in results) for s in STAGES}
+    cpu_total = sum(totals.values())
+    mb = sum(r["bytes"] for r in results) / 1e6
+    print(f"files={len(results)} input={mb:.1f}MB nodes={sum(r['nodes'] for r in results)} items={sum(r['items'] for r in results)}")
+    print(f"{'stage':<26}{'seconds':>10}{'share':>8}{'MB/s':>9}")
+    for s in STAGES:
+        share = totals[s] / cpu_total * 100 if cpu_total else 0.0
+        rate = mb / totals[s] if totals[s] else 0.0
+        print(f"{STAGE_LABELS[s]:<26}{totals[s]:>10.3f}{share:>7.1f}%{rate:>9.1f}")
+    print(f"{'total':<26}{cpu_total:>10.3f}")
+
+    print(f"\nslowest {min(args.top, len(results))} files:")
+    for r in sorted(results, key=lambda x: -x["total"])[: args.top]:
+        worst = max(STAGES, key=lambda s: r["stages"][s])
+        print(
+            f"  {r['file']:<24}{r['total']:>8.3f}s  {r['bytes'] / 1e6:>6.2f}MB  nodes={r['nodes']:<6} "
+            f"slowest={STAGE_LABELS[worst]} ({r['stages'][worst]:.3f}s)"
+        )
+    print(f"\nwall {wall:.1f}s with {args.jobs} jobs")
+
+    if args.json:
+        out = {
+            "v": 1,
+            "jobs": args.jobs,
+            "repeat": args.repeat,
+            "max_batch_chars": args.max_batch_chars,
+            "wall_s": round(wall, 3),
+            "totals": {s: round(v, 4) for s, v in totals.items()},
+            "files": [
+                {**{k: v for k, v in r.items() if k != "stages"}, "stages": {s: round(v, 5) for s, v in r["stages"].items()}}
+                for r in results
+            ],
+        }
+        Path(args.json).write_text(json.dumps(out, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"written: {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
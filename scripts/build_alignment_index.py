@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus_blocks import (
+    DERIVED_DIR,
+    KO_DIR,
+    ROMN_DIR,
+    alignment_keys,
+    block_shape_sig,
+    default_jobs,
+    has_para_num,
+    load_blocks,
+    load_ko_blocks,
+    write_json,
+)
+
+
+ALIGN_DIR = DERIVED_DIR / "align"
+
+
+def build_alignment(romn_items, ko_items):
+    romn_keys = alignment_keys(romn_items)
+    ko_keys = alignment_keys(ko_items)
+    ko_by_key = {key: idx for idx, key in enumerate(ko_keys)}
+
+    mapping = []
+    trans = []
+    mismatched = []
+    translated = 0
+    total = 0
+    for idx, (item, key) in enumerate(zip(romn_items, romn_keys)):
+        counted = has_para_num(item)
+        if counted:
+            total += 1
+        ko_idx = ko_by_key.pop(key, -1)
+        if ko_idx >= 0:
+            k = ko_items[ko_idx]
+            if k["type"] != item["type"] or k["rend"] != item["rend"]:
+                mismatched.append(key)
+                ko_idx = -1
+        is_trans = ko_idx >= 0 and ko_items[ko_idx]["trans"]
+        if counted and is_trans:
+            translated += 1
+        mapping.append(ko_idx)
+        trans.append(1 if is_trans else 0)
+
+    return {
+        "v": 2,
+        "romn": len(romn_items),
+        "ko": len(ko_items),
+        # Checked by the reader instead of the counts: moved blocks can leave the totals unchanged.
+        "romnSig": block_shape_sig(romn_items),
+        "koSig": block_shape_sig(ko_items),
+        "translated": translated,
+        "total": total,
+        "keys": romn_keys,
+        "map": mapping,
+        "trans": trans,
+        "mismatched": mismatched,
+        "orphans": sorted(ko_by_key, key=ko_by_key.get),
+    }
+
+
+def build_one(file_name):
+    romn_items = load_blocks(ROMN_DIR / file_name)
+    ko_items = load_ko_blocks(KO_DIR / file_name)
+    table = build_alignment(romn_items, ko_items)
+    table["file"] = file_name
+    write_json(ALIGN_DIR / f"{file_name}.json", table)
+    return file_name, table
+
+
+def list_pairs(only=None):
+    names = sorted(p.name for p in KO_DIR.glob("*.xml") if (ROMN_DIR / p.name).exists())
+    if only:
+        names = [n for n in names if n in set(only)]
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build (div id, paranum, ordinal) alignment tables between romn and ko corpus files."
+    )
+    parser.add_argument("--file", action="append", default=[], help="Only this file name (repeatable)")
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero when ko blocks do not align")
+    args = parser.parse_args()
+
+    names = list_pairs(args.file)
+    if not names:
+        print("no romn/ko file pairs found")
+        return
+
+    started = time.time()
+    bad = 0
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        for file_name, table in pool.map(build_one, names):
+            issues = len(table["mismatched"]) + len(table["orphans"])
+            if issues:
+                bad += 1
+            print(
+                f"{file_name}: romn={table['romn']} ko={table['ko']} "
+                f"translated={table['translated']}/{table['total']} "
+                f"mismatched={len(table['mismatched'])} orphans={len(table['orphans'])}"
+            )
+    print(f"written: {ALIGN_DIR} ({len(names)} files, {time.time() - started:.1f}s)")
+    if args.strict and bad:
+        raise RuntimeError(f"{bad} file(s) with unaligned ko blocks")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus_blocks import (
+    DERIVED_DIR,
+    ROMN_DIR,
+    default_jobs,
+    list_romn_files,
+    load_blocks,
+    public_block,
+    write_json,
+)
+
+
+BLOCKS_DIR = DERIVED_DIR / "blocks/romn"
+
+
+def block_json_path(file_name):
+    return BLOCKS_DIR / f"{file_name}.json"
+
+
+def is_fresh(file_name):
+    out = block_json_path(file_name)
+    if not out.exists():
+        return False
+    return out.stat().st_mtime >= (ROMN_DIR / file_name).stat().st_mtime
+
+
+def build_one(file_name):
+    items = [public_block(x) for x in load_blocks(ROMN_DIR / file_name)]
+    out = block_json_path(file_name)
+    write_json(out, items)
+    return file_name, len(items), out.stat().st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Emit reader block records (index.html buildBlockFromNode) as compact UTF-8 JSON per romn file."
+    )
+    parser.add_argument("--file", action="append", default=[], help="Only this file name (repeatable)")
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    parser.add_argument("--force", action="store_true", help="Rebuild even when the JSON is newer than the XML")
+    args = parser.parse_args()
+
+    names = args.file or list_romn_files()
+    todo = [n for n in names if args.force or not is_fresh(n)]
+    print(f"romn files: {len(names)}, to build: {len(todo)}")
+
+    started = time.time()
+    total_bytes = 0
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        for file_name, count, size in pool.map(build_one, todo):
+            total_bytes += size
+            print(f"{file_name}: blocks={count} bytes={size}")
+    print(f"written: {BLOCKS_DIR} ({len(todo)} files, {total_bytes} bytes, {time.time() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
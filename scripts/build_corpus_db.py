@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+import argparse
+import difflib
+import html
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_alignment_index import build_alignment
+from build_section_payloads import block_sections, leaves_by_file, section_refs
+from corpus_blocks import (
+    DERIVED_DIR,
+    KO_DIR,
+    ROMN_DIR,
+    TREE_PATH,
+    default_jobs,
+    file_sha256,
+    list_romn_files,
+    load_blocks,
+    load_ko_blocks,
+    load_tree,
+)
+
+
+DB_PATH = DERIVED_DIR / "corpus.sqlite"
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+  name TEXT NOT NULL,
+  lang TEXT NOT NULL,
+  sig TEXT NOT NULL,
+  blocks INTEGER NOT NULL,
+  PRIMARY KEY (name, lang)
+);
+CREATE TABLE IF NOT EXISTS blocks (
+  id INTEGER PRIMARY KEY,
+  file TEXT NOT NULL,
+  lang TEXT NOT NULL,
+  pos INTEGER NOT NULL,
+  ord INTEGER,
+  div TEXT,
+  section TEXT,
+  href TEXT,
+  slice TEXT,
+  paranum TEXT,
+  type TEXT,
+  rend TEXT,
+  trans INTEGER,
+  text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocks_file ON blocks (file, lang, ord);
+CREATE VIRTUAL TABLE IF NOT EXISTS romn_fts USING fts5(
+  text, content='blocks', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS ko_fts USING fts5(
+  text, content='blocks', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS blocks_ai AFTER INSERT ON blocks BEGIN
+  INSERT INTO romn_fts(rowid, text) SELECT new.id, new.text WHERE new.lang = 'romn';
+  INSERT INTO ko_fts(rowid, text) SELECT new.id, new.text WHERE new.lang = 'ko';
+END;
+CREATE TRIGGER IF NOT EXISTS blocks_ad AFTER DELETE ON blocks BEGIN
+  INSERT INTO romn_fts(romn_fts, rowid, text) SELECT 'delete', old.id, old.text WHERE old.lang = 'romn';
+  INSERT INTO ko_fts(ko_fts, rowid, text) SELECT 'delete', old.id, old.text WHERE old.lang = 'ko';
+END;
+"""
+
+QUERY_TOKEN_RE = re.compile(r"[^\W_]+")
+MARK_OPEN = "\ue000"
+MARK_CLOSE = "\ue001"
+MAX_PAGE_SIZE = 100
+RESULT_COLUMNS = ("file", "lang", "ord", "div", "section", "href", "slice", "paranum", "type", "rend", "trans")
+
+COLUMNS = ("file", "lang", "pos", "ord", "div", "section", "href", "slice", "paranum", "type", "rend", "trans", "text")
+
+
+def connect(path=DB_PATH, readonly=False):
+    if readonly:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def file_rows(file_name, leaves, langs):
+    # Rows for one file: romn blocks with their section, ko blocks placed on the romn ordinal they align to.
+    romn_items = load_blocks(ROMN_DIR / file_name)
+    ranges = section_refs(romn_items, leaves)
+    owner = block_sections(ranges, len(romn_items))
+
+    def section_cols(b):
+        if b is None or b < 0 or owner[b] < 0:
+            return None, None, None
+        (start, end), pairs = ranges[owner[b]]
+        href, label = pairs[0]
+        return label, href, f"{start}-{end}"
+
+    out = {}
+    if "romn" in langs:
+        # trans is a ko property; romn rows leave it NULL.
+        rows = [
+            (b, x["div"], *section_cols(b), x["num"], x["type"], x["rend"], None, x["text"])
+            for b, x in enumerate(romn_items)
+            if x["text"]
+        ]
+        out["romn"] = [(file_name, "romn", pos, *row) for pos, row in enumerate(rows)]
+    if "ko" in langs:
+        ko_items = load_ko_blocks(KO_DIR / file_name)
+        romn_of = {k: b for b, k in enumerate(build_alignment(romn_items, ko_items)["map"]) if k >= 0}
+        rows = [
+            (romn_of.get(k), x["div"], *section_cols(romn_of.get(k)),
+             x["num"], x["type"], x["rend"], 1 if x["trans"] else 0, x["text"])
+            for k, x in enumerate(ko_items)
+            if x["text"]
+        ]
+        out["ko"] = [(file_name, "ko", pos, *row) for pos, row in enumerate(rows)]
+    return file_name, out
+
+
+def _rows_job(job):
+    return file_rows(*job)
+
+
+def search(conn, query, lang="romn", page=1, size=20, file=None, translated_only=False):
+    """Ranked FTS5 search. romn: diacritic-insensitive words, last word as a prefix.
+    ko: trigram substrings; words shorter than 3 characters fall back to LIKE."""
+    tokens = QUERY_TOKEN_RE.findall(query or "")
+    size = max(1, min(int(size), MAX_PAGE_SIZE))
+    page = max(1, int(page))
+    out = {"q": query, "lang": lang, "page": page, "size": size, "total": 0, "results": []}
+    if not tokens or lang not in ("romn", "ko"):
+        return out
+
+    fts = f"{lang}_fts"
+    where = ["b.lang = ?"]
+    params = [lang]
+    if lang == "romn":
+        match = " ".join(f'"{t}"' for t in tokens[:-1])
+        match += f' "{tokens[-1]}"' + ("" if query.endswith(" ") else "*")
+        match_terms = [match.strip()]
+    else:
+        match_terms = [" ".join(f'"{t}"' for t in tokens if len(t) >= 3)]
+        for t in tokens:
+            if len(t) < 3:
+                where.append("b.text LIKE ?")
+                params.append(f"%{t}%")
+    if file:
+        where.append("b.file = ?")
+        params.append(file)
+    if translated_only:
+        if lang == "ko":
+            where.append("b.trans = 1")
+        else:
+            # romn blocks whose aligned ko block is translated.
+            where.append(
+                "EXISTS (SELECT 1 FROM blocks k WHERE k.file = b.file AND k.lang = 'ko' AND k.ord = b.ord AND k.trans = 1)"
+            )
+
+    cols = ", ".join(f"b.{c}" for c in RESULT_COLUMNS)
+    if match_terms[0]:
+        base = f"FROM {fts} JOIN blocks b ON b.id = {fts}.rowid WHERE {fts} MATCH ? AND " + " AND ".join(where)
+        params = match_terms + params
+        # Trigram "tokens" are single characters, so ko snippets need a wider window.
+        snippet = f"snippet({fts}, 0, '{MARK_OPEN}', '{MARK_CLOSE}', '…', {16 if lang == 'romn' else 48})"
+        order = "ORDER BY rank"
+    else:
+        base = "FROM blocks b WHERE " + " AND ".join(where)
+        snippet = "substr(b.text, 1, 120)"
+        order = "ORDER BY b.file, b.ord"
+
+    out["total"] = conn.execute(f"SELECT count(*) {base}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT {cols}, {snippet} {base} {order} LIMIT ? OFFSET ?", params + [size, (page - 1) * size]
+    ).fetchall()
+    for row in rows:
+        item = dict(zip(RESULT_COLUMNS, row[:-1]))
+        item["snippet"] = html.escape(row[-1]).replace(MARK_OPEN, "<mark>").replace(MARK_CLOSE, "</mark>")
+        out["results"].append(item)
+    return out
+
+
+def apply_rows(conn, name, lang, rows):
+    """Bring the stored rows of one file/lang to `rows`, touching only blocks that changed.
+
+    Old and new blocks are aligned on their text in document order (pos). Blocks with the
+    same text keep their row and FTS entry; only their position columns are updated when a
+    neighbour was added or removed. Runs of changed text are deleted and reinserted, so the
+    FTS triggers re-index just those. Returns (updated, deleted, inserted)."""
+    old = conn.execute(
+        f"SELECT id, {', '.join(COLUMNS)} FROM blocks WHERE file = ? AND lang = ? ORDER BY pos", (name, lang)
+    ).fetchall()
+    matcher = difflib.SequenceMatcher(None, [r[-1] for r in old], [r[-1] for r in rows], autojunk=False)
+    updates = []
+    delete_ids = []
+    inserts = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            updates.extend((*new[:-1], prev[0]) for prev, new in zip(old[i1:i2], rows[j1:j2]) if prev[1:] != new)
+        else:
+            delete_ids.extend((prev[0],) for prev in old[i1:i2])
+            inserts.extend(rows[j1:j2])
+    set_cols = ", ".join(f"{c} = ?" for c in COLUMNS[:-1])
+    conn.executemany(f"UPDATE blocks SET {set_cols} WHERE id = ?", updates)
+    conn.executemany("DELETE FROM blocks WHERE id = ?", delete_ids)
+    placeholders = ", ".join("?" for _ in COLUMNS)
+    conn.executemany(f"INSERT INTO blocks ({', '.join(COLUMNS)}) VALUES ({placeholders})", inserts)
+    return len(updates), len(delete_ids), len(inserts)
+
+
+def plan(conn, names, grouped):
+    known = {(n, lang): sig for n, lang, sig in conn.execute("SELECT name, lang, sig FROM files")}
+    tree_sig = file_sha256(TREE_PATH)[:16]
+    todo = []
+    sigs = {}
+    for name in names:
+        romn_sig = f"{file_sha256(ROMN_DIR / name)[:16]}:{tree_sig}"
+        want = {"romn": romn_sig}
+        if (KO_DIR / name).exists():
+            want["ko"] = f"{file_sha256(KO_DIR / name)[:16]}:{romn_sig}"
+        langs = [lang for lang, sig in want.items() if known.get((name, lang)) != sig]
+        if langs:
+            todo.append((name, grouped[name], langs))
+            sigs.update({(name, lang): want[lang] for lang in langs})
+    keep = {(n, lang) for n in names for lang in ("romn", "ko") if lang == "romn" or (KO_DIR / n).exists()}
+    stale = sorted(set(known) - keep)
+    return todo, sigs, stale
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ingest romn and ko blocks into a SQLite FTS5 database (data/derived/corpus.sqlite)."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes for parsing")
+    parser.add_argument("--force", action="store_true", help="Drop the database and ingest everything")
+    parser.add_argument("--db", default=str(DB_PATH), help="Database path")
+    args = parser.parse_args()
+
+    db_path = Path(args.db)
+    if args.force and db_path.exists():
+        db_path.unlink()
+    conn = connect(db_path)
+    version = None
+    if conn.execute("SELECT name FROM sqlite_master WHERE name = 'meta'").fetchone():
+        row = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        version = row[0] if row else None
+    if version not in (None, str(SCHEMA_VERSION)):
+        conn.close()
+        db_path.unlink()
+        conn = connect(db_path)
+    conn.executescript(SCHEMA)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+
+    grouped = leaves_by_file(load_tree())
+    names = [n for n in list_romn_files() if n in grouped]
+    todo, sigs, stale = plan(conn, names, grouped)
+
+    started = time.time()
+    for name, lang in stale:
+        with conn:
+            conn.execute("DELETE FROM blocks WHERE file = ? AND lang = ?", (name, lang))
+            conn.execute("DELETE FROM files WHERE name = ? AND lang = ?", (name, lang))
+        print(f"{name} [{lang}]: removed")
+
+    totals = [0, 0, 0]
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        for name, by_lang in pool.map(_rows_job, todo):
+            # One transaction per file: readers never see a half-ingested file.
+            parts = []
+            with conn:
+                for lang, rows in by_lang.items():
+                    counts = apply_rows(conn, name, lang, rows)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (name, lang, sigs[(name, lang)], len(rows))
+                    )
+                    totals = [t + c for t, c in zip(totals, counts)]
+                    parts.append(f"{lang}={len(rows)} (~{counts[0]} -{counts[1]} +{counts[2]})")
+            print(f"{name}: " + " ".join(parts))
+
+    if todo or stale:
+        with conn:
+            conn.execute("INSERT INTO romn_fts(romn_fts) VALUES ('optimize')")
+            conn.execute("INSERT INTO ko_fts(ko_fts) VALUES ('optimize')")
+    total = conn.execute("SELECT count(*) FROM blocks").fetchone()[0]
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    print(
+        f"written: {db_path} (ingested {len(todo)} files, updated {totals[0]} / deleted {totals[1]} / "
+        f"inserted {totals[2]} rows, removed {len(stale)} files, "
+        f"total rows {total}, {db_path.stat().st_size} bytes, {time.time() - started:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import re
+import subprocess
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from corpus_blocks import (
+    DERIVED_DIR,
+    KO_DIR,
+    ROMN_DIR,
+    ROOT_DIR,
+    TREE_PATH,
+    default_jobs,
+    file_sha256,
+    list_romn_files,
+    read_json,
+    write_json,
+)
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+STATE_DIR = DERIVED_DIR / ".state"
+HASHES_PATH = STATE_DIR / "input-hashes.json"
+GRAPH_PATH = STATE_DIR / "build-graph.json"
+REPORT_PATH = STATE_DIR / "build-report.json"
+LOCAL_IMPORT_RE = re.compile(r"^(?:from|import)\s+(\w+)", re.M)
+DEFAULT_PARALLEL = 3
+
+
+class Step:
+    """One builder script in the graph.
+
+    per_file steps take repeatable --file and are rebuilt only for units whose inputs changed;
+    the others are rebuilt as a whole when any input or upstream step changed. deps are the
+    steps whose output or computation this one uses: it starts only after they finish."""
+
+    def __init__(self, name, script, units, tree=False, deps=(), per_file=False, jobs=True, args=()):
+        self.name = name
+        self.script = script
+        self.units = units  # "romn": every romn file, "ko": romn/ko pairs, None: no file inputs
+        self.tree = tree
+        self.deps = tuple(deps)
+        self.per_file = per_file
+        self.jobs = jobs
+        self.args = tuple(args)
+
+
+STEPS = [
+    Step("blocks", "build_block_json.py", "romn", per_file=True, args=("--force",)),
+    Step("align", "build_alignment_index.py", "ko", per_file=True),
+    Step("sections", "build_section_payloads.py", "romn", tree=True, per_file=True),
+    # merged, ko-search and corpus-db pair blocks through the same alignment that align publishes.
+    Step("merged", "build_merged_sections.py", "ko", tree=True, deps=("align",), per_file=True),
+    # ko-status and deltas are computed from the merged sections.
+    Step("ko-status", "build_ko_status.py", "ko", tree=True, deps=("merged",)),
+    Step("toc", "build_toc_shards.py", None, tree=True, deps=("ko-status", "sections"), jobs=False),
+    Step("search", "build_search_index.py", "romn", tree=True),
+    Step("ko-search", "build_ko_search_index.py", "ko", tree=True, deps=("align",)),
+    Step("corpus-db", "build_corpus_db.py", "ko+romn", tree=True, deps=("align",)),
+    Step("pages", "build_page_index.py", "romn", tree=True),
+    Step("xref", "build_xref_index.py", "romn", tree=True),
+    Step("deltas", "build_ko_deltas.py", "ko", tree=True, deps=("merged",)),
+    Step(
+        "precompress",
+        "build_precompressed.py",
+        None,
+        deps=("blocks", "align", "sections", "merged", "ko-status", "toc", "search", "ko-search", "pages", "xref", "deltas"),
+    ),
+]
+
+
+def check_steps(steps):
+    # Every dep must name an earlier step, which also rules out cycles.
+    seen = set()
+    for step in steps:
+        unknown = [d for d in step.deps if d not in seen]
+        if unknown:
+            raise ValueError(f"step {step.name}: unknown or later deps {unknown}")
+        seen.add(step.name)
+
+
+def digest(parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+def code_digest(script):
+    # Contents of the builder and every scripts/ module it imports (corpus_blocks.py, ...), so editing
+    # a builder or a shared helper invalidates the step even when no corpus input changed.
+    seen = {}
+    todo = [script]
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        path = SCRIPTS_DIR / name
+        seen[name] = file_sha256(path)
+        for module in LOCAL_IMPORT_RE.findall(path.read_text(encoding="utf-8")):
+            if (SCRIPTS_DIR / f"{module}.py").exists():
+                todo.append(f"{module}.py")
+    return digest([f"{n}={h}" for n, h in sorted(seen.items())])
+
+
+def _hash_job(path):
+    return path, file_sha256(Path(path))
+
+
+def hash_inputs(paths, jobs):
+    # Content hashes, reusing the previous hash when (mtime, size) is unchanged.
+    cache = read_json(HASHES_PATH, {}) or {}
+    out = {}
+    todo = []
+    for path in paths:
+        st = path.stat()
+        key = str(path.relative_to(ROOT_DIR))
+        prev = cache.get(key)
+        if prev and prev[0] == st.st_mtime_ns and prev[1] == st.st_size:
+            out[key] = prev[2]
+        else:
+            todo.append(str(path))
+    with ProcessPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        for path, sha in pool.map(_hash_job, todo, chunksize=8):
+            p = Path(path)
+            st = p.stat()
+            key = str(p.relative_to(ROOT_DIR))
+            cache[key] = [st.st_mtime_ns, st.st_size, sha]
+            out[key] = sha
+    write_json(HASHES_PATH, {k: cache[k] for k in sorted(out)})
+    return out, len(todo)
+
+
+def rel(path):
+    return str(path.relative_to(ROOT_DIR))
+
+
+def unit_digests(step, romn_names, ko_names, hashes):
+    if step.units is None:
+        return {}
+    tree = [hashes[rel(TREE_PATH)]] if step.tree else []
+    if step.units == "romn":
+        return {n: digest([hashes[rel(ROMN_DIR / n)], *tree]) for n in romn_names}
+    units = {n: digest([hashes[rel(ROMN_DIR / n)], hashes[rel(KO_DIR / n)], *tree]) for n in ko_names}
+    if step.units == "ko+romn":
+        for n in romn_names:
+            units.setdefault(n, digest([hashes[rel(ROMN_DIR / n)], *tree]))
+    return units
+
+
+def per_unit_dep(step, dep):
+    # A per-file dep over the same files, whose unit inputs are covered by this step's own unit
+    # digests: a change to one of its files already marks the same file here, so only its code
+    # has to invalidate the whole step.
+    return step.per_file and dep.per_file and dep.units == step.units and (step.tree or not dep.tree)
+
+
+def dep_stamps_for(step, steps_by_name, stamps, codes):
+    out = []
+    for d in step.deps:
+        if per_unit_dep(step, steps_by_name[d]):
+            out.append(f"{d}:code={codes.get(d, '')}")
+        else:
+            out.append(f"{d}={stamps.get(d, '')}")
+    return out
+
+
+def plan_step(step, units, prev, dep_stamps, code, force):
+    # Returns (stamp, files to rebuild or None for "whole step", cache hits, unit count).
+    stamp = digest([f"{k}={v}" for k, v in sorted(units.items())] + dep_stamps + [f"code={code}"])
+    if not force and prev.get("stamp") == stamp:
+        return stamp, [], max(len(units), 1), max(len(units), 1)
+    if not step.per_file or force or not prev.get("units") or prev.get("deps", []) != dep_stamps or prev.get("code") != code:
+        return stamp, None, 0, max(len(units), 1)
+    old = prev["units"]
+    if set(old) - set(units):
+        # A file disappeared; builders only clean up on a full run.
+        return stamp, None, 0, len(units)
+    changed = sorted(n for n, d in units.items() if old.get(n) != d)
+    return stamp, changed, len(units) - len(changed), len(units)
+
+
+def run_step(step, files, jobs, verbose):
+    # Runs in a worker thread next to other steps, so --verbose output is prefixed with the step name.
+    cmd = [sys.executable, str(SCRIPTS_DIR / step.script), *step.args]
+    if step.jobs:
+        cmd += ["--jobs", str(jobs)]
+    for name in files or []:
+        cmd += ["--file", name]
+    started = time.time()
+    tail = deque(maxlen=40)
+    with subprocess.Popen(
+        cmd, cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+    ) as proc:
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            if verbose:
+                print(f"[{step.name}] {line}", flush=True)
+            if line.strip():
+                tail.append(line)
+        returncode = proc.wait()
+    elapsed = time.time() - started
+    if returncode != 0 and not verbose:
+        sys.stderr.write("".join(f"[{step.name}] {line}\n" for line in tail))
+    summary = tail[-1] if tail and not verbose else ""
+    return returncode == 0, elapsed, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild data/derived incrementally: hash the corpus inputs and rerun only the steps (and files) they affect."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes (hashing and each builder)")
+    parser.add_argument(
+        "--parallel", type=int, default=DEFAULT_PARALLEL, help="Independent steps run at the same time"
+    )
+    parser.add_argument("--only", action="append", default=[], choices=[s.name for s in STEPS], help="Run only this step (repeatable)")
+    parser.add_argument("--force", action="store_true", help="Ignore recorded hashes and rebuild every selected step")
+    parser.add_argument("--dry-run", action="store_true", help="Print the plan without running anything")
+    parser.add_argument("--verbose", action="store_true", help="Stream builder output instead of one summary line")
+    args = parser.parse_args()
+    check_steps(STEPS)
+
+    started = time.time()
+    romn_names = list_romn_files()
+    ko_names = sorted(p.name for p in KO_DIR.glob("*.xml") if (ROMN_DIR / p.name).exists())
+    paths = [TREE_PATH, *(ROMN_DIR / n for n in romn_names), *(KO_DIR / n for n in ko_names)]
+    hashes, rehashed = hash_inputs(paths, args.jobs)
+    hash_time = time.time() - started
+    print(f"inputs: {len(paths)} files, rehashed {rehashed} ({hash_time:.1f}s)")
+
+    graph = read_json(GRAPH_PATH, {}) or {}
+    # Stamps as of this run, so a dry run also shows what an upstream rebuild would invalidate.
+    stamps = {name: entry.get("stamp", "") for name, entry in graph.items()}
+    codes = {step.name: code_digest(step.script) for step in STEPS}
+    steps_by_name = {step.name: step for step in STEPS}
+    order = {step.name: idx for idx, step in enumerate(STEPS)}
+    report = []
+    failed = set()
+    totals = {"units": 0, "hits": 0}
+    # A step starts once none of its deps is still waiting or running; deps left out by --only
+    # count as done and contribute their recorded stamp.
+    waiting = [step for step in STEPS if not args.only or step.name in args.only]
+    running = {}
+
+    def start(step):
+        """Plan one ready step: record it as skipped/cached/planned, or submit it to the pool."""
+        if any(d in failed for d in step.deps):
+            report.append({"step": step.name, "status": "skipped", "reason": "upstream failed"})
+            failed.add(step.name)
+            print(f"[{step.name}] skipped (upstream failed)")
+            return
+        prev = graph.get(step.name, {})
+        units = unit_digests(step, romn_names, ko_names, hashes)
+        dep_stamps = dep_stamps_for(step, steps_by_name, stamps, codes)
+        stamp, files, hits, count = plan_step(step, units, prev, dep_stamps, codes[step.name], args.force)
+        totals["units"] += count
+        totals["hits"] += hits
+        entry = {"step": step.name, "units": count, "hits": hits}
+        if files == []:
+            entry.update(status="cached", seconds=0.0)
+            report.append(entry)
+            print(f"[{step.name}] cached ({count} units)")
+            return
+        what = "all" if files is None else f"{len(files)}/{count} files"
+        entry["rebuild"] = what
+        if args.dry_run:
+            stamps[step.name] = stamp
+            entry.update(status="planned")
+            report.append(entry)
+            print(f"[{step.name}] would rebuild {what}")
+            return
+        print(f"[{step.name}] started: {what}", flush=True)
+        future = pool.submit(run_step, step, files, args.jobs, args.verbose)
+        running[future] = (step, entry, {"stamp": stamp, "code": codes[step.name], "deps": dep_stamps, "units": units})
+
+    def finish(future):
+        step, entry, record = running.pop(future)
+        ok, elapsed, summary = future.result()
+        entry.update(status="ok" if ok else "failed", seconds=round(elapsed, 2))
+        report.append(entry)
+        print(f"[{step.name}] {'rebuilt' if ok else 'FAILED'} {entry['rebuild']} in {elapsed:.1f}s" + (f" | {summary}" if summary else ""))
+        if not ok:
+            failed.add(step.name)
+            return
+        stamps[step.name] = record["stamp"]
+        graph[step.name] = record
+        write_json(GRAPH_PATH, graph)
+
+    slots = max(args.parallel, 1)
+    with ThreadPoolExecutor(max_workers=slots) as pool:
+        while waiting or running:
+            busy = {s.name for s in waiting} | {step.name for step, _, _ in running.values()}
+            ready = [s for s in waiting if not any(d in busy for d in s.deps)]
+            started_any = False
+            for step in ready:
+                if len(running) >= slots:
+                    break
+                waiting.remove(step)
+                start(step)
+                started_any = True
+            if started_any:
+                # Cached, planned and skipped steps finish at once and may unblock others.
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(future)
+
+    report.sort(key=lambda entry: order[entry["step"]])
+    rate = totals["hits"] / totals["units"] if totals["units"] else 1.0
+    elapsed = time.time() - started
+    if not args.dry_run:
+        write_json(
+            REPORT_PATH,
+            {"v": 1, "seconds": round(elapsed, 2), "hash_seconds": round(hash_time, 2), "hit_rate": round(rate, 4), "steps": report},
+        )
+    print(
+        f"done: {elapsed:.1f}s, cache hit rate {rate:.1%} ({totals['hits']}/{totals['units']} units)"
+        + (", FAILED: " + ", ".join(sorted(failed)) if failed else "")
+    )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from build_merged_sections import KO_DEFAULTS, merge_file_sections
+from build_section_payloads import leaves_by_file
+from corpus_blocks import (
+    DERIVED_DIR,
+    KO_DIR,
+    ROMN_DIR,
+    TREE_PATH,
+    default_jobs,
+    file_sha256,
+    load_tree,
+    read_json,
+    write_json,
+)
+
+
+DELTAS_DIR = DERIVED_DIR / "deltas"
+VERSIONS_PATH = DELTAS_DIR / "versions.json"
+STATE_PATH = DERIVED_DIR / ".state/ko-deltas.json"
+KO_FIELDS = ("koText", "koNum", "koTrans")
+DEFAULT_KEEP = 20
+
+
+def ko_fields(item):
+    return {k: item[k] for k in KO_FIELDS if k in item}
+
+
+def fields_hash(fields):
+    return hashlib.sha1(json.dumps(fields, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def content_digest(section):
+    # Everything in a section payload that patches do not carry: labels and the romn side of each block.
+    base = {
+        "labels": section["labels"],
+        "items": [{k: v for k, v in item.items() if k not in KO_FIELDS} for item in section["items"]],
+    }
+    return fields_hash(base)
+
+
+def section_snapshot(file_name, leaves):
+    # {slice: (stats, content digest, {offset: ko fields})} from the same merge build_merged_sections.py writes.
+    _, _, _, sections = merge_file_sections(file_name, leaves)
+    out = {}
+    for section in sections:
+        ko = {}
+        for offset, item in enumerate(section["items"]):
+            fields = ko_fields(item)
+            if fields:
+                ko[str(offset)] = fields
+        stats = {k: section[k] for k in ("translated", "total", "state")}
+        out[f"{section['start']}-{section['end']}"] = (stats, content_digest(section), ko)
+    return file_name, out
+
+
+def _snapshot_job(job):
+    return section_snapshot(*job)
+
+
+def diff_section(prev_hashes, ko):
+    changed = {off: fields for off, fields in ko.items() if prev_hashes.get(off) != fields_hash(fields)}
+    removed = sorted((off for off in prev_hashes if off not in ko), key=int)
+    return changed, removed
+
+
+def delta_path(file_name, slice_name, version):
+    return DELTAS_DIR / file_name / slice_name / f"{version}.json"
+
+
+def prune_deltas(file_name, slice_name, latest, keep):
+    # Keeps the newest `keep` patches; returns the oldest version still on disk (latest + 1 when none).
+    oldest = max(latest - keep + 1, 2)
+    section_dir = DELTAS_DIR / file_name / slice_name
+    if section_dir.exists():
+        for path in section_dir.glob("*.json"):
+            if int(path.stem) < oldest:
+                path.unlink()
+    return oldest if (section_dir / f"{latest}.json").exists() else latest + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Publish per-section ko patches: diff merged sections against the last run and bump section versions."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="Patches kept per section")
+    parser.add_argument("--reset", action="store_true", help="Forget history: every section restarts at version 1")
+    args = parser.parse_args()
+
+    state = read_json(STATE_PATH, {}) or {}
+    if args.reset or state.get("v") != 2:
+        if DELTAS_DIR.exists():
+            shutil.rmtree(DELTAS_DIR)
+        state = {"v": 2, "files": {}}
+    prev_files = state["files"]
+    tree_sig = file_sha256(TREE_PATH)[:16]
+
+    grouped = leaves_by_file(load_tree())
+    todo = []
+    sigs = {}
+    present = set()
+    for ko_path in sorted(KO_DIR.glob("*.xml")):
+        name = ko_path.name
+        if not (ROMN_DIR / name).exists() or name not in grouped:
+            continue
+        present.add(name)
+        sig = f"{file_sha256(ko_path)[:16]}:{file_sha256(ROMN_DIR / name)[:16]}:{tree_sig}"
+        if prev_files.get(name, {}).get("sig") != sig:
+            sigs[name] = sig
+            todo.append((name, grouped[name]))
+    for name in set(prev_files) - present:
+        del prev_files[name]
+        shutil.rmtree(DELTAS_DIR / name, ignore_errors=True)
+        print(f"{name}: removed")
+
+    started = time.time()
+    patches = 0
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        for name, snapshot in pool.map(_snapshot_job, todo):
+            old_sections = prev_files.get(name, {}).get("sections", {})
+            sections = {}
+            bumped = 0
+            for slice_name, (stats, digest, ko) in snapshot.items():
+                old = old_sections.get(slice_name)
+                hashes = {off: fields_hash(fields) for off, fields in ko.items()}
+                if old is None or old["d"] != digest:
+                    # New section (first run, boundaries moved) or new romn text under the same slice:
+                    # clients load the full payload, since patches only carry ko fields.
+                    sections[slice_name] = {"v": 1, "min": 2, "d": digest, "h": hashes}
+                    shutil.rmtree(DELTAS_DIR / name / slice_name, ignore_errors=True)
+                    continue
+                changed, removed = diff_section(old["h"], ko)
+                if not changed and not removed:
+                    sections[slice_name] = old
+                    continue
+                version = old["v"] + 1
+                write_json(
+                    delta_path(name, slice_name, version),
+                    {"file": name, "slice": slice_name, "v": version, "set": changed, "del": removed, **stats},
+                )
+                sections[slice_name] = {
+                    "v": version,
+                    "min": prune_deltas(name, slice_name, version, args.keep),
+                    "d": digest,
+                    "h": hashes,
+                }
+                bumped += 1
+            for slice_name in set(old_sections) - set(snapshot):
+                shutil.rmtree(DELTAS_DIR / name / slice_name, ignore_errors=True)
+            prev_files[name] = {"sig": sigs[name], "sections": sections}
+            patches += bumped
+            print(f"{name}: sections={len(sections)} patched={bumped}")
+
+    versions = {
+        name: {slice_name: [sec["v"], sec["min"], sec["d"]] for slice_name, sec in sorted(entry["sections"].items())}
+        for name, entry in sorted(prev_files.items())
+    }
+    write_json(VERSIONS_PATH, {"v": 2, "files": versions})
+    write_json(STATE_PATH, state)
+    print(
+        f"written: {DELTAS_DIR} (files={len(versions)}, rescanned={len(todo)}, new patches={patches}, "
+        f"{time.time() - started:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+import argparse
+import re
+import shutil
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+from build_alignment_index import build_alignment
+from build_section_payloads import block_sections, leaves_by_file, section_refs
+from corpus_blocks import (
+    DERIVED_DIR,
+    KO_DIR,
+    ROMN_DIR,
+    TREE_PATH,
+    default_jobs,
+    file_sha256,
+    load_blocks,
+    load_ko_blocks,
+    load_tree,
+    read_json,
+    write_json,
+)
+
+
+KO_SEARCH_DIR = DERIVED_DIR / "search/ko"
+STATE_PATH = DERIVED_DIR / ".state/ko-search.json"
+TOKEN_RE = re.compile(r"[^\W_]+")
+HANJA_GLOSS_RE = re.compile(r"\([\u3400-\u9fff\uf900-\ufaff]+\)")
+GRAM_SIZES = (2, 3)
+DEFAULT_SHARDS = 64
+
+
+def grams(text):
+    # Character bigrams/trigrams inside each word; must match koGrams in index.html.
+    # Words are taken both with and without "(漢字)" glosses, so "귀명(歸命)하옵나이다"
+    # also yields the grams of "귀명하옵나이다".
+    text = unicodedata.normalize("NFC", text.lower())
+    out = set()
+    for variant in (text, HANJA_GLOSS_RE.sub("", text)):
+        for m in TOKEN_RE.finditer(variant):
+            token = m.group(0)
+            for n in GRAM_SIZES:
+                for i in range(len(token) - n + 1):
+                    out.add(token[i : i + n])
+    return out
+
+
+def gram_shard(gram, shard_count):
+    # 32-bit FNV-1a over code points (index.html koGramShard).
+    h = 2166136261
+    for ch in gram:
+        h ^= ord(ch)
+        h = (h * 16777619) & 0xFFFFFFFF
+    return h % shard_count
+
+
+def translated_blocks(file_name, leaves):
+    # {romn block ordinal: [section index, ko text]} for ko blocks marked trans="true".
+    romn_items = load_blocks(ROMN_DIR / file_name)
+    ko_items = load_ko_blocks(KO_DIR / file_name)
+    table = build_alignment(romn_items, ko_items)
+    ranges = section_refs(romn_items, leaves)
+    owner = block_sections(ranges, len(romn_items))
+    blocks = {}
+    for b, ko_idx in enumerate(table["map"]):
+        if ko_idx >= 0 and ko_items[ko_idx]["trans"] and ko_items[ko_idx]["text"]:
+            blocks[str(b)] = [owner[b], ko_items[ko_idx]["text"]]
+    sections = [[f"{start}-{end}", pairs[0][0], pairs[0][1]] for (start, end), pairs in ranges]
+    return file_name, sections, blocks
+
+
+def _blocks_job(job):
+    return translated_blocks(*job)
+
+
+class ShardStore:
+    """Loads gram shards on first touch and writes back only the ones that changed."""
+
+    def __init__(self, shard_count):
+        self.shard_count = shard_count
+        self.loaded = {}
+        self.dirty = set()
+
+    def shard(self, idx):
+        if idx not in self.loaded:
+            data = read_json(KO_SEARCH_DIR / f"{idx}.json", {}) or {}
+            self.loaded[idx] = {g: set(zip(p[0::3], p[1::3], p[2::3])) for g, p in data.get("grams", {}).items()}
+        return self.loaded[idx]
+
+    def postings(self, gram):
+        idx = gram_shard(gram, self.shard_count)
+        self.dirty.add(idx)
+        return self.shard(idx).setdefault(gram, set())
+
+    def remove(self, gram, f, b):
+        posts = self.postings(gram)
+        posts.difference_update([p for p in posts if p[0] == f and p[2] == b])
+
+    def drop_file(self, f):
+        for idx in range(self.shard_count):
+            shard = self.shard(idx)
+            for gram, posts in shard.items():
+                stale = [p for p in posts if p[0] == f]
+                if stale:
+                    posts.difference_update(stale)
+                    self.dirty.add(idx)
+
+    def save(self):
+        for idx in sorted(self.dirty):
+            shard = self.shard(idx)
+            out = {}
+            for gram in sorted(shard):
+                if shard[gram]:
+                    out[gram] = [x for p in sorted(shard[gram]) for x in p]
+            write_json(KO_SEARCH_DIR / f"{idx}.json", {"v": 1, "grams": out})
+        return len(self.dirty)
+
+
+def index_complete(shard_count):
+    # The state file alone is not enough: search/ko/ may have been deleted or only partly copied.
+    names = ["root.json", *(f"{idx}.json" for idx in range(shard_count))]
+    return all((KO_SEARCH_DIR / name).exists() for name in names)
+
+
+def update_index(jobs, shard_count, force=False):
+    state = read_json(STATE_PATH, {}) or {}
+    fresh = force or state.get("v") != 1 or state.get("shards") != shard_count or not index_complete(shard_count)
+    if fresh:
+        if not force and state.get("files") and not index_complete(shard_count):
+            print(f"{KO_SEARCH_DIR} missing or incomplete: rebuilding")
+        if KO_SEARCH_DIR.exists():
+            shutil.rmtree(KO_SEARCH_DIR)
+        state = {"v": 1, "shards": shard_count, "files": {}}
+    prev_files = state["files"]
+    tree_sig = file_sha256(TREE_PATH)[:16]
+
+    grouped = None
+    todo = []
+    sigs = {}
+    present = set()
+    for ko_path in sorted(KO_DIR.glob("*.xml")):
+        name = ko_path.name
+        romn_path = ROMN_DIR / name
+        if not romn_path.exists():
+            continue
+        present.add(name)
+        sig = f"{file_sha256(ko_path)[:16]}:{file_sha256(romn_path)[:16]}:{tree_sig}"
+        if prev_files.get(name, {}).get("sig") == sig:
+            continue
+        if grouped is None:
+            grouped = leaves_by_file(load_tree())
+        if name in grouped:
+            sigs[name] = sig
+            todo.append((name, grouped[name]))
+
+    removed = sorted(set(prev_files) - present)
+    if not todo and not removed:
+        print(f"up to date: {KO_SEARCH_DIR} ({len(prev_files)} files)")
+        return
+
+    store = ShardStore(shard_count)
+    if fresh:
+        # Write every shard, even one no gram hashes to, so index_complete() holds afterwards.
+        store.dirty.update(range(shard_count))
+    used_ids = {entry["id"] for entry in prev_files.values()}
+    for name in removed:
+        store.drop_file(prev_files.pop(name)["id"])
+        print(f"{name}: removed")
+
+    changed_blocks = 0
+    with ProcessPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        for name, sections, blocks in pool.map(_blocks_job, todo):
+            old = prev_files.get(name)
+            if old is None:
+                f = next(i for i in range(len(used_ids) + 1) if i not in used_ids)
+                used_ids.add(f)
+                old = {"id": f, "sections": sections, "blocks": {}}
+            f = old["id"]
+            old_blocks = old["blocks"]
+            if old.get("sections") != sections:
+                # Section boundaries moved: every posting of this file carries a stale section index.
+                store.drop_file(f)
+                old_blocks = {}
+
+            touched = 0
+            for b, (s, text) in blocks.items():
+                prev = old_blocks.get(b)
+                if prev and prev == [s, text]:
+                    continue
+                if prev:
+                    for gram in grams(prev[1]):
+                        store.remove(gram, f, int(b))
+                for gram in grams(text):
+                    store.postings(gram).add((f, s, int(b)))
+                touched += 1
+            for b in set(old_blocks) - set(blocks):
+                for gram in grams(old_blocks[b][1]):
+                    store.remove(gram, f, int(b))
+                touched += 1
+
+            prev_files[name] = {
+                "id": f,
+                "sig": sigs[name],
+                "sections": sections,
+                # Previous text is kept so a later edit can retract exactly the grams it added.
+                "blocks": blocks,
+            }
+            changed_blocks += touched
+            print(f"{name}: translated blocks={len(blocks)} changed={touched}")
+
+    written = store.save()
+    files = [None] * (max(used_ids, default=-1) + 1)
+    for name, entry in prev_files.items():
+        files[entry["id"]] = {"n": name, "s": entry["sections"]}
+    write_json(
+        KO_SEARCH_DIR / "root.json",
+        {"v": 1, "n": list(GRAM_SIZES), "shards": shard_count, "files": files},
+    )
+    write_json(STATE_PATH, state)
+    print(
+        f"written: {KO_SEARCH_DIR} (files={len(prev_files)}, reindexed={len(todo)}, "
+        f"changed blocks={changed_blocks}, shards rewritten={written}/{shard_count})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Incrementally build a character bigram/trigram index over translated (trans=\"true\") ko blocks."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS, help="Number of hash shards")
+    parser.add_argument("--force", action="store_true", help="Discard the previous index and rebuild")
+    args = parser.parse_args()
+
+    started = time.time()
+    update_index(args.jobs, args.shards, force=args.force)
+    print(f"done in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from build_merged_sections import merge_file_sections
+from build_section_payloads import leaves_by_file
+from corpus_blocks import (
+    DERIVED_DIR,
+    KO_DIR,
+    ROMN_DIR,
+    ROOT_DIR,
+    TREE_PATH,
+    default_jobs,
+    file_sha256,
+    load_tree,
+    normalize_section_label,
+    read_json,
+    write_json,
+)
+
+
+STATUS_PATH = DERIVED_DIR / "ko-status.json"
+HASHES_PATH = DERIVED_DIR / ".state/ko-status-hashes.json"
+
+
+class HashCache:
+    """file_sha256 keyed on (st_mtime_ns, st_size): a --watch poll only stat()s unchanged files."""
+
+    def __init__(self, path=HASHES_PATH):
+        self.path = path
+        self.entries = read_json(path, {}) or {}
+        self.dirty = False
+
+    def sha256(self, path):
+        st = path.stat()
+        key = str(path.relative_to(ROOT_DIR))
+        prev = self.entries.get(key)
+        if prev and prev[0] == st.st_mtime_ns and prev[1] == st.st_size:
+            return prev[2]
+        sha = file_sha256(path)
+        self.entries[key] = [st.st_mtime_ns, st.st_size, sha]
+        self.dirty = True
+        return sha
+
+    def save(self):
+        if self.dirty:
+            write_json(self.path, self.entries)
+            self.dirty = False
+
+
+def file_status(file_name, leaves, sig):
+    _, translated, total, sections = merge_file_sections(file_name, leaves)
+    slice_by_label = {}
+    out_sections = {}
+    for section in sections:
+        slice_name = f"{section['start']}-{section['end']}"
+        out_sections[slice_name] = [section["translated"], section["total"], section["state"]]
+        for label in section["labels"]:
+            slice_by_label[label] = slice_name
+    refs = {}
+    for href, label in leaves:
+        refs.setdefault(href, {})[normalize_section_label(label)] = slice_by_label[label]
+    # Same rule as ko_state: with no countable blocks, a file is partial if any section is.
+    if total > 0:
+        state = "none" if translated == 0 else "full" if translated >= total else "partial"
+    else:
+        state = "partial" if any(section["state"] != "none" for section in sections) else "none"
+    return file_name, {
+        "sig": sig,
+        "translated": translated,
+        "total": total,
+        "state": state,
+        "sections": out_sections,
+        "refs": refs,
+    }
+
+
+def _status_job(job):
+    return file_status(*job)
+
+
+def build_hrefs(files):
+    hrefs = {}
+    for entry in files.values():
+        for href, labels in entry["refs"].items():
+            target = hrefs.setdefault(href, {})
+            for label_key, slice_name in labels.items():
+                target[label_key] = entry["sections"][slice_name]
+    return hrefs
+
+
+def update_status(jobs, force=False, quiet=False, hashes=None):
+    hashes = hashes or HashCache()
+    prev = read_json(STATUS_PATH, {}) or {}
+    prev_files = prev.get("files", {}) if prev.get("v") == 1 else {}
+    tree_sig = hashes.sha256(TREE_PATH)
+    grouped = None
+
+    files = {}
+    todo = []
+    for ko_path in sorted(KO_DIR.glob("*.xml")):
+        name = ko_path.name
+        romn_path = ROMN_DIR / name
+        if not romn_path.exists():
+            continue
+        sig = f"{hashes.sha256(ko_path)[:16]}:{hashes.sha256(romn_path)[:16]}:{tree_sig[:16]}"
+        old = prev_files.get(name)
+        if not force and old and old.get("sig") == sig:
+            files[name] = old
+            continue
+        if grouped is None:
+            grouped = leaves_by_file(load_tree())
+        if name in grouped:
+            todo.append((name, grouped[name], sig))
+
+    hashes.save()
+    removed = sorted(set(prev_files) - {p.name for p in KO_DIR.glob("*.xml")})
+    if not todo and not removed and prev_files:
+        if not quiet:
+            print(f"up to date: {STATUS_PATH} ({len(files)} files)")
+        return False
+
+    with ProcessPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        for name, entry in pool.map(_status_job, todo):
+            files[name] = entry
+            print(f"{name}: translated={entry['translated']}/{entry['total']} sections={len(entry['sections'])}")
+    for name in removed:
+        print(f"{name}: removed")
+
+    write_json(
+        STATUS_PATH,
+        {
+            "v": 1,
+            "files": {name: files[name] for name in sorted(files)},
+            "hrefs": build_hrefs(files),
+        },
+    )
+    print(f"written: {STATUS_PATH} (rebuilt {len(todo)}, reused {len(files) - len(todo)})")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build data/derived/ko-status.json with per-file and per-section translated/total counts."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    parser.add_argument("--force", action="store_true", help="Rebuild every file, ignoring stored hashes")
+    parser.add_argument(
+        "--watch",
+        type=float,
+        default=0,
+        help="Keep running and refresh whenever a ko file changes (poll interval in seconds)",
+    )
+    args = parser.parse_args()
+
+    hashes = HashCache()
+    update_status(args.jobs, force=args.force, hashes=hashes)
+    if args.watch <= 0:
+        return
+    try:
+        while True:
+            time.sleep(args.watch)
+            update_status(args.jobs, quiet=True, hashes=hashes)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+import argparse
+import shutil
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from build_alignment_index import build_alignment
+from build_section_payloads import leaves_by_file
+from corpus_blocks import (
+    DERIVED_DIR,
+    KO_DIR,
+    ROMN_DIR,
+    default_jobs,
+    has_para_num,
+    ko_state,
+    load_blocks,
+    load_ko_blocks,
+    load_tree,
+    public_block,
+    section_range,
+    translation_stats,
+    write_json,
+)
+
+
+MERGED_DIR = DERIVED_DIR / "merged"
+# Ko fields of a block with no translation (no aligned ko block, or trans="false").
+KO_DEFAULTS = {"koTrans": False}
+
+
+def merge_ko_into_roman(romn_items, ko_items, table):
+    # index.html mergeKoIntoRoman, joined through the alignment table instead of by position.
+    out = []
+    translated = 0
+    total = 0
+    for idx, r in enumerate(romn_items):
+        r = public_block(r)
+        counted = has_para_num(r)
+        if counted:
+            total += 1
+        ko_idx = table["map"][idx]
+        if ko_idx < 0 or not ko_items[ko_idx]["trans"]:
+            out.append({**r, **KO_DEFAULTS})
+            continue
+        k = ko_items[ko_idx]
+        if counted:
+            translated += 1
+        out.append({**r, "koText": k["text"], "koNum": k["num"], "koTrans": True})
+    return out, translated, total
+
+
+def merge_file_sections(file_name, leaves):
+    romn_items = load_blocks(ROMN_DIR / file_name)
+    ko_items = load_ko_blocks(KO_DIR / file_name)
+    table = build_alignment(romn_items, ko_items)
+    merged, file_translated, file_total = merge_ko_into_roman(romn_items, ko_items, table)
+
+    ranges = defaultdict(list)
+    for _, label in leaves:
+        ranges[section_range(merged, label)].append(label)
+
+    sections = []
+    for (start, end), labels in sorted(ranges.items()):
+        scoped = merged[start:end]
+        translated, total = translation_stats(scoped)
+        sections.append(
+            {
+                "file": file_name,
+                "start": start,
+                "end": end,
+                "labels": labels,
+                "translated": translated,
+                "total": total,
+                "state": ko_state(scoped, translated, total),
+                "items": scoped,
+            }
+        )
+    return merged, file_translated, file_total, sections
+
+
+def build_file(file_name, leaves):
+    _, file_translated, file_total, sections = merge_file_sections(file_name, leaves)
+    out_dir = MERGED_DIR / file_name
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    for section in sections:
+        write_json(out_dir / f"{section['start']}-{section['end']}.json", section)
+    return file_name, file_translated, file_total, len(sections)
+
+
+def _build_job(job):
+    return build_file(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-merge romn and ko blocks per TOC section, with translated/total stats."
+    )
+    parser.add_argument("--file", action="append", default=[], help="Only this file name (repeatable)")
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    args = parser.parse_args()
+
+    grouped = leaves_by_file(load_tree())
+    names = sorted(p.name for p in KO_DIR.glob("*.xml") if p.name in grouped and (ROMN_DIR / p.name).exists())
+    if args.file:
+        names = [n for n in names if n in set(args.file)]
+    if not names:
+        print("no translated files found")
+        return
+
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        for file_name, translated, total, section_count in pool.map(
+            _build_job, [(n, grouped[n]) for n in names]
+        ):
+            print(f"{file_name}: translated={translated}/{total} sections={section_count}")
+    print(f"written: {MERGED_DIR} ({len(names)} files, {time.time() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
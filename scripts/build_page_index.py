@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import argparse
+import re
+import shutil
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from build_section_payloads import block_sections, leaves_by_file, section_refs
+from corpus_blocks import (
+    DERIVED_DIR,
+    ROMN_DIR,
+    default_jobs,
+    list_romn_files,
+    load_blocks,
+    load_tree,
+    write_json,
+)
+
+
+PAGES_DIR = DERIVED_DIR / "pages"
+# node_to_html renders <pb ed="P" n="1.0001"/> as <a name="P1.0001"></a>.
+PB_ANCHOR_RE = re.compile(r'<a name="([A-Za-z]+)(\d+)\.(\d+)"></a>')
+
+
+def file_pages(file_name, leaves):
+    # [(edition, volume, page, section index, block ordinal)] in document order.
+    items = load_blocks(ROMN_DIR / file_name)
+    ranges = section_refs(items, leaves)
+    owner = block_sections(ranges, len(items))
+    pages = []
+    for b, item in enumerate(items):
+        for ed, vol, page in PB_ANCHOR_RE.findall(item["html"]):
+            pages.append((ed.upper(), int(vol), int(page), owner[b], b))
+    sections = [[f"{start}-{end}", pairs[0][0], pairs[0][1]] for (start, end), pairs in ranges]
+    return file_name, sections, pages
+
+
+def _pages_job(job):
+    return file_pages(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Index <pb ed n> page breaks: (edition, volume.page) -> (file, section, block)."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    args = parser.parse_args()
+
+    grouped = leaves_by_file(load_tree())
+    names = [n for n in list_romn_files() if n in grouped]
+
+    started = time.time()
+    files = []
+    # shards[(ed, vol)][page] -> [[file, section, block], ...]; a volume number recurs across books.
+    shards = defaultdict(lambda: defaultdict(list))
+    total = 0
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        for file_name, sections, pages in pool.map(_pages_job, [(n, grouped[n]) for n in names]):
+            f = len(files)
+            files.append({"n": file_name, "s": sections})
+            seen = set()
+            for ed, vol, page, s, b in pages:
+                # A page that restarts inside the same file keeps its first occurrence.
+                if (ed, vol, page) in seen:
+                    continue
+                seen.add((ed, vol, page))
+                shards[(ed, vol)][str(page)].append([f, s, b])
+            total += len(seen)
+            print(f"{file_name}: pages={len(seen)}")
+
+    if PAGES_DIR.exists():
+        shutil.rmtree(PAGES_DIR)
+    editions = defaultdict(list)
+    for (ed, vol), pages in sorted(shards.items()):
+        editions[ed].append(vol)
+        write_json(PAGES_DIR / ed / f"{vol}.json", {"v": 1, "ed": ed, "vol": vol, "pages": pages})
+    write_json(PAGES_DIR / "root.json", {"v": 1, "files": files, "eds": editions})
+    print(
+        f"written: {PAGES_DIR} ({len(files)} files, {total} page refs, "
+        f"{sum(len(v) for v in editions.values())} shards, editions={','.join(sorted(editions))}, "
+        f"{time.time() - started:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
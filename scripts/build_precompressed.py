@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus_blocks import DERIVED_DIR, default_jobs, write_json
+
+
+DIST_DIR = DERIVED_DIR / "dist"
+DIST_MANIFEST_PATH = DIST_DIR / "manifest.json"
+# Per-area manifests: dist/manifest/<area>.<hash>.json, named in the root manifest.
+AREA_MANIFEST_DIR = "manifest"
+HASH_LEN = 12
+
+
+def hashed_name(logical, digest):
+    # "sections/a.xml/0-12.json" -> "sections/a.xml/0-12.<digest>.json"
+    stem, ext = os.path.splitext(logical)
+    return f"{stem}.{digest}{ext}"
+
+
+def gzip_bytes(data):
+    # mtime=0 keeps the .gz bytes stable across rebuilds.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def write_bytes(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+def publish_one(logical):
+    data = (DERIVED_DIR / logical).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LEN]
+    out = DIST_DIR / hashed_name(logical, digest)
+    gz_out = out.with_name(out.name + ".gz")
+    if out.exists() and gz_out.exists():
+        return logical, digest, len(data), gz_out.stat().st_size, True
+    packed = gzip_bytes(data)
+    write_bytes(out, data)
+    write_bytes(gz_out, packed)
+    return logical, digest, len(data), len(packed), False
+
+
+def list_payloads():
+    out = []
+    for path in DERIVED_DIR.rglob("*.json"):
+        rel = path.relative_to(DERIVED_DIR)
+        # dist/ is the output; dot directories hold builder state, not reader payloads.
+        if rel.parts[0] == DIST_DIR.name or any(part.startswith(".") for part in rel.parts):
+            continue
+        out.append(rel.as_posix())
+    return sorted(out)
+
+
+def area_of(logical):
+    # "sections/a.xml/0-12.json" -> "sections"; top-level files ("ko-status.json") have no area.
+    head, sep, _ = logical.partition("/")
+    return head if sep else None
+
+
+def publish_manifests(files):
+    """Root manifest {"v":2,"areas":{area: hash},"files":{top-level: hash}} plus one hashed
+    manifest per area, so a payload lookup only waits for its own area's hashes.
+    Returns the dist names of the area manifests (for prune)."""
+    areas = {}
+    root_files = {}
+    for logical, digest in files.items():
+        area = area_of(logical)
+        if area is None:
+            root_files[logical] = digest
+        else:
+            areas.setdefault(area, {})[logical] = digest
+    area_digests = {}
+    names = set()
+    for area, area_files in sorted(areas.items()):
+        data = json.dumps({"v": 2, "area": area, "files": area_files}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LEN]
+        name = hashed_name(f"{AREA_MANIFEST_DIR}/{area}.json", digest)
+        write_bytes(DIST_DIR / name, data)
+        write_bytes(DIST_DIR / (name + ".gz"), gzip_bytes(data))
+        area_digests[area] = digest
+        names.update((name, name + ".gz"))
+    write_json(DIST_MANIFEST_PATH, {"v": 2, "areas": area_digests, "files": root_files})
+    write_bytes(DIST_MANIFEST_PATH.with_name(DIST_MANIFEST_PATH.name + ".gz"), gzip_bytes(DIST_MANIFEST_PATH.read_bytes()))
+    return names
+
+
+def prune(keep):
+    removed = 0
+    for path in DIST_DIR.rglob("*"):
+        if not path.is_file() or path == DIST_MANIFEST_PATH or path.name == DIST_MANIFEST_PATH.name + ".gz":
+            continue
+        if path.relative_to(DIST_DIR).as_posix() not in keep:
+            path.unlink()
+            removed += 1
+    for path in sorted(DIST_DIR.rglob("*"), reverse=True):
+        if path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Copy derived JSON into data/derived/dist under content-hashed names, with gzip -9 siblings and a manifest."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    parser.add_argument("--no-prune", action="store_true", help="Keep hashed files no longer in the manifest")
+    args = parser.parse_args()
+
+    logicals = list_payloads()
+    if not logicals:
+        print(f"no derived payloads under {DERIVED_DIR}")
+        return
+
+    started = time.time()
+    files = {}
+    keep = set()
+    raw_total = gz_total = reused = 0
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        for logical, digest, raw_size, gz_size, skipped in pool.map(publish_one, logicals, chunksize=16):
+            files[logical] = digest
+            name = hashed_name(logical, digest)
+            keep.update((name, name + ".gz"))
+            raw_total += raw_size
+            gz_total += gz_size
+            reused += skipped
+
+    keep.update(publish_manifests(files))
+    removed = 0 if args.no_prune else prune(keep)
+
+    ratio = gz_total / raw_total if raw_total else 0
+    print(
+        f"written: {DIST_DIR} ({len(files)} payloads, compressed {len(files) - reused}, reused {reused}, "
+        f"pruned {removed}, {raw_total} -> {gz_total} bytes gzip ({ratio:.1%}), "
+        f"manifest={DIST_MANIFEST_PATH.stat().st_size} bytes, {time.time() - started:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
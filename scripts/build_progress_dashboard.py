@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+import argparse
+import glob
+import html
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from build_section_payloads import leaves_by_file
+from corpus_blocks import (
+    DERIVED_DIR,
+    KO_DIR,
+    ROMN_DIR,
+    ROOT_DIR,
+    default_jobs,
+    list_romn_files,
+    load_tree,
+    read_json,
+    write_json,
+)
+from forecast_translation import (
+    DEFAULT_HISTORY,
+    _workload_job,
+    history_rates,
+    parse_ts,
+    read_history,
+    read_run_batches,
+)
+from progress_tracker import ProgressTracker
+
+
+OUT_DIR = KO_DIR / "log"
+CACHE_PATH = DERIVED_DIR / ".state/progress-dashboard.json"
+RUN_GLOBS = [
+    "data/translated/**/*.state.json",
+    "data/corpus/ko/**/*.state.json",
+]
+# A run with no checkpoint for this long is shown as paused rather than running.
+STALE_SECONDS = 900
+
+
+def stat_sig(path: Path):
+    # Size and mtime, not a content hash: the watch loop stats every file on each poll.
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return "-"
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def iso(ts):
+    if ts is None:
+        return ""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def scan_files(names, jobs, max_batch_chars, force=False):
+    """Per-file workload (forecast_translation.file_workload), reusing cached entries whose
+    romn/ko files and tree are unchanged. Returns (files, rescanned names)."""
+    prev = read_json(CACHE_PATH, {}) or {}
+    prev_files = prev.get("files", {}) if prev.get("v") == 1 else {}
+    tree_sig = stat_sig(ROOT_DIR / "data/tree/romn/tree.json")
+    grouped = None
+
+    files = {}
+    todo = []
+    sigs = {}
+    for name in names:
+        sig = f"{stat_sig(ROMN_DIR / name)}|{stat_sig(KO_DIR / name)}|{tree_sig}|{max_batch_chars}"
+        old = prev_files.get(name)
+        if not force and old and old.get("sig") == sig:
+            files[name] = old
+            continue
+        if grouped is None:
+            grouped = leaves_by_file(load_tree())
+        sigs[name] = sig
+        todo.append((name, grouped.get(name, []), max_batch_chars))
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=max(jobs, 1)) as pool:
+            for entry in pool.map(_workload_job, todo):
+                entry["sig"] = sigs[entry["file"]]
+                files[entry["file"]] = entry
+        write_json(CACHE_PATH, {"v": 1, "files": {n: files[n] for n in sorted(files)}})
+    return files, [job[0] for job in todo]
+
+
+def read_runs(patterns, files, now):
+    """Engine runs from their *.state.json checkpoints. The run's metrics JSONL or progress
+    log is replayed into a ProgressTracker for the weighted rate and ETA bounds."""
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(str(ROOT_DIR / pattern), recursive=True))
+    runs = []
+    for path in sorted(paths):
+        try:
+            state = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        sig = state.get("run_sig") or {}
+        name = Path(sig.get("input") or path).name
+        total = sig.get("total_items") or 0
+        done = state.get("processed_items", 0)
+        prefix = path[: -len(".state.json")]
+        log_path = next((p for p in (prefix + ".metrics.jsonl", prefix + ".progress.log") if Path(p).exists()), None)
+        batches = read_run_batches(log_path) if log_path else []
+        if name in files:
+            total_chars = files[name]["chars"]
+        else:
+            logged_items = sum(b["items"] for b in batches)
+            total_chars = round(total * sum(b["chars"] for b in batches) / logged_items) if logged_items else 0
+        # State files keep items, not chars; assume done items are of average length.
+        progress = ProgressTracker(total, total_chars, done, round(total_chars * done / total) if total else 0)
+        for b in batches:
+            progress.observe(b["chars"], b["seconds"])
+        eta = progress.eta()
+        # The engine's own checkpoint time; the file mtime only says when it was last copied or checked out.
+        updated = parse_ts(state.get("updated_at")) or Path(path).stat().st_mtime
+        if total and done >= total:
+            status = "done"
+        elif now - updated <= STALE_SECONDS:
+            status = "running"
+        else:
+            status = "paused"
+        runs.append(
+            {
+                "file": name,
+                "output": str(Path(prefix).relative_to(ROOT_DIR)) if prefix.startswith(str(ROOT_DIR)) else prefix,
+                "model": sig.get("model") or "",
+                "status": status,
+                **progress.snapshot(),
+                # A paused run finishes eta_s after it is resumed; only a live run gets wall-clock times.
+                "finish": [iso(updated + x) if math.isfinite(x) else "" for x in eta] if eta and status == "running" else [],
+                "updated": iso(updated),
+            }
+        )
+    return runs
+
+
+def build_report(files, runs, rate, now):
+    runs_by_file = {}
+    for run in runs:
+        runs_by_file.setdefault(run["file"], []).append(run)
+    cps = rate["chars_per_sec"]
+    rows = []
+    for name in sorted(files):
+        f = files[name]
+        done_chars = f["chars"] - f["remaining_chars"]
+        rows.append(
+            {
+                "file": name,
+                "has_ko": f["has_ko"],
+                "chars": f["chars"],
+                "done_chars": done_chars,
+                "pct": round(100.0 * done_chars / f["chars"], 1) if f["chars"] else 0.0,
+                "remaining_chars": f["remaining_chars"],
+                "work_s": round(f["remaining_chars"] / cps) if cps else None,
+                "sections": [
+                    {
+                        "slice": s["slice"],
+                        "label": s["label"],
+                        "done_chars": s["chars"] - s["remaining_chars"],
+                        "chars": s["chars"],
+                    }
+                    for s in f["sections"]
+                ],
+                "runs": runs_by_file.get(name, []),
+            }
+        )
+    chars = sum(r["chars"] for r in rows)
+    done = sum(r["done_chars"] for r in rows)
+    return {
+        "v": 1,
+        "generated_at": iso(now),
+        "summary": {
+            "files": len(rows),
+            "files_done": sum(1 for r in rows if r["chars"] and r["remaining_chars"] == 0),
+            "chars": chars,
+            "done_chars": done,
+            "pct": round(100.0 * done / chars, 2) if chars else 0.0,
+            "chars_per_sec": round(cps, 2) if cps else None,
+            "rate_batches": rate["batches"],
+            "work_s": round((chars - done) / cps) if cps else None,
+            "runs_active": sum(1 for r in runs if r["status"] == "running"),
+        },
+        "runs": runs,
+        "files": rows,
+    }
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}:{rest // 60:02d}" if hours < 48 else f"{hours / 24:.1f}일"
+
+
+def bar(pct):
+    return f'<span class="bar"><span style="width:{min(pct, 100):.1f}%"></span></span> {pct:.1f}%'
+
+
+def render_html(report, refresh):
+    e = html.escape
+    s = report["summary"]
+    out = [
+        "<!doctype html>",
+        '<html lang="ko"><head><meta charset="utf-8">',
+        '<meta name="viewport" content="width=device-width, initial-scale=1">',
+    ]
+    if refresh:
+        out.append(f'<meta http-equiv="refresh" content="{int(refresh)}">')
+    out += [
+        "<title>번역 진행 현황</title>",
+        "<style>",
+        "body{font:14px/1.45 system-ui,sans-serif;margin:1.5rem;color:#222}",
+        "table{border-collapse:collapse;margin:.5rem 0 1.5rem}",
+        "th,td{padding:.2rem .6rem;border-bottom:1px solid #ddd;text-align:right;white-space:nowrap}",
+        "th:first-child,td:first-child{text-align:left}",
+        ".bar{display:inline-block;width:8rem;height:.6rem;background:#eee;vertical-align:middle}",
+        ".bar span{display:block;height:100%;background:#4a8}",
+        "details{margin:.1rem 0}summary{cursor:pointer}",
+        ".running{color:#07a}.paused{color:#a60}.done{color:#4a8}.muted{color:#888}",
+        "</style></head><body>",
+        "<h1>번역 진행 현황</h1>",
+        f'<p class="muted">생성: {e(report["generated_at"])} · <code>scripts/build_progress_dashboard.py</code></p>',
+        f"<p>전체 {bar(s['pct'])} · 글자 {s['done_chars']:,} / {s['chars']:,} · 완료 파일 {s['files_done']} / {s['files']}"
+        f" · 남은 작업 {format_duration(s['work_s'])} (평균 {s['chars_per_sec'] or '-'}자/초, 배치 {s['rate_batches']}개 기준)</p>",
+    ]
+
+    if report["runs"]:
+        out += [
+            "<h2>엔진 실행</h2>",
+            "<table><tr><th>출력</th><th>모델</th><th>상태</th><th>항목</th><th>진행</th><th>자/초 (가중)</th><th>남은 시간 (90% 범위)</th><th>예상 완료</th><th>체크포인트</th></tr>",
+        ]
+        for r in report["runs"]:
+            pct = 100.0 * r["done_items"] / r["total_items"] if r["total_items"] else 0.0
+            eta = "-"
+            if r["eta_s"]:
+                low, expected, high = r["eta_s"]
+                eta = f"{format_duration(expected)} ({format_duration(low)}–{format_duration(high) if high is not None else '?'})"
+            finish = e(r["finish"][1]) if r["finish"] else ""
+            out.append(
+                f"<tr><td>{e(r['output'])}</td><td>{e(r['model'])}</td><td class=\"{r['status']}\">{r['status']}</td>"
+                f"<td>{r['done_items']:,} / {r['total_items']:,}</td><td>{bar(pct)}</td><td>{r['chars_per_sec'] or '-'}</td>"
+                f"<td>{eta}</td><td>{finish}</td><td>{e(r['updated'])}</td></tr>"
+            )
+        out.append("</table>")
+
+    out += [
+        "<h2>파일별</h2>",
+        "<table><tr><th>파일</th><th>진행</th><th>번역 글자</th><th>전체 글자</th><th>남은 작업</th></tr>",
+    ]
+    for f in sorted(report["files"], key=lambda x: (-x["pct"] if 0 < x["pct"] < 100 else 0, x["file"])):
+        sections = "".join(
+            f"<tr><td>{e(sec['slice'])} {e(sec['label'])}</td>"
+            f"<td>{bar(100.0 * sec['done_chars'] / sec['chars'] if sec['chars'] else 0.0)}</td>"
+            f"<td>{sec['done_chars']:,}</td><td>{sec['chars']:,}</td><td></td></tr>"
+            for sec in f["sections"]
+        )
+        name = e(f["file"]) if f["has_ko"] else f'<span class="muted">{e(f["file"])}</span>'
+        if sections:
+            name = f"<details><summary>{name}</summary><table>{sections}</table></details>"
+        out.append(
+            f"<tr><td>{name}</td><td>{bar(f['pct'])}</td><td>{f['done_chars']:,}</td><td>{f['chars']:,}</td>"
+            f"<td>{format_duration(f['work_s'])}</td></tr>"
+        )
+    out += ["</table>", "</body></html>"]
+    return "\n".join(out) + "\n"
+
+
+def refresh(args, names, force=False, quiet=False, last=None):
+    now = time.time()
+    files, rescanned = scan_files(names, args.jobs, args.max_batch_chars, force=force)
+    runs = read_runs(RUN_GLOBS, files, now)
+    rate = history_rates(read_history(DEFAULT_HISTORY))
+    report = build_report(files, runs, rate, now)
+    # generated_at alone does not count as a change, so an idle watch does not rewrite the files.
+    key = json.dumps({k: v for k, v in report.items() if k != "generated_at"}, sort_keys=True)
+    if key == last:
+        return last
+    out_dir = Path(args.out_dir)
+    write_json(out_dir / "progress.json", report)
+    html_path = out_dir / "progress.html"
+    tmp = html_path.with_suffix(".html.tmp")
+    tmp.write_text(render_html(report, args.watch), encoding="utf-8")
+    tmp.replace(html_path)
+    if not quiet or rescanned:
+        s = report["summary"]
+        print(
+            f"written: {html_path} ({s['pct']}% of {s['chars']} chars, {s['runs_active']} running; "
+            f"rescanned {len(rescanned)}, reused {len(files) - len(rescanned)})"
+        )
+    return key
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build a static translation progress dashboard (HTML + JSON) from the corpus, engine checkpoints and logs."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    parser.add_argument("--file", action="append", default=[], help="Only this romn file (repeatable)")
+    parser.add_argument("--out-dir", default=str(OUT_DIR), help="Where progress.html and progress.json go")
+    parser.add_argument("--max-batch-chars", type=int, default=5000, help="Batch size for remaining-work estimates")
+    parser.add_argument("--force", action="store_true", help="Rescan every file, ignoring the cache")
+    parser.add_argument(
+        "--watch",
+        type=float,
+        default=0,
+        help="Keep running and refresh as checkpoints and ko files change (poll interval in seconds)",
+    )
+    args = parser.parse_args()
+
+    names = args.file or list_romn_files()
+    last = refresh(args, names, force=args.force)
+    if args.watch <= 0:
+        return
+    try:
+        while True:
+            time.sleep(args.watch)
+            last = refresh(args, names, quiet=True, last=last)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
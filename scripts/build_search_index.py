@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+import argparse
+import re
+import shutil
+import sys
+import time
+import unicodedata
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from build_section_payloads import block_sections, leaves_by_file, section_refs
+from corpus_blocks import (
+    DERIVED_DIR,
+    ROMN_DIR,
+    default_jobs,
+    list_romn_files,
+    load_blocks,
+    load_tree,
+    write_json,
+)
+
+
+SEARCH_DIR = DERIVED_DIR / "search/romn"
+WORD_RE = re.compile(r"[^\W\d_]+")
+SAFE_KEY_RE = re.compile(r"^[a-z]+$")
+
+
+def fold(word):
+    # ā→a, ṃ/ṁ→m, ñ→n, ṭ→t ...: drop combining marks after NFD. Must match foldPali in index.html.
+    decomposed = unicodedata.normalize("NFD", word.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.category(ch).startswith("M"))
+
+
+def tokenize(text):
+    # Exact (lowercased NFC) word forms; combining marks stay attached to their letter.
+    return [m.group(0) for m in WORD_RE.finditer(unicodedata.normalize("NFC", text.lower()))]
+
+
+def index_file(file_name, leaves):
+    items = load_blocks(ROMN_DIR / file_name)
+    ranges = section_refs(items, leaves)
+    owner = block_sections(ranges, len(items))
+    postings = defaultdict(lambda: array("i"))
+    for b, item in enumerate(items):
+        seen = set()
+        for form in tokenize(item["text"]):
+            if form in seen:
+                continue
+            seen.add(form)
+            postings[form].extend((owner[b], b))
+    sections = [[f"{start}-{end}", pairs[0][0], pairs[0][1]] for (start, end), pairs in ranges]
+    return file_name, len(items), sections, {form: arr.tobytes() for form, arr in postings.items()}
+
+
+def _index_job(job):
+    return index_file(*job)
+
+
+def encode_postings(flat):
+    # (file, section, block) triples sorted by file then block; block is delta-coded within a file.
+    out = []
+    prev_f = prev_b = -1
+    for i in range(0, len(flat), 3):
+        f, s, b = flat[i], flat[i + 1], flat[i + 2]
+        out.extend((f, s, b - prev_b if f == prev_f else b))
+        prev_f, prev_b = f, b
+    return out
+
+
+def partition(terms, prefix_len, max_postings, max_len):
+    # terms: {folded: count}. Returns {shard key: [folded...]}, splitting heavy prefixes one char deeper.
+    groups = defaultdict(list)
+    for term in terms:
+        groups[term[:prefix_len]].append(term)
+    shards = {}
+    for key, members in groups.items():
+        weight = sum(terms[t] for t in members)
+        if weight <= max_postings or prefix_len >= max_len:
+            shards[key] = members
+            continue
+        # Terms no longer than the key stay in the key's own shard.
+        shards[key] = [t for t in members if len(t) <= prefix_len]
+        deeper = partition(
+            {t: terms[t] for t in members if len(t) > prefix_len}, prefix_len + 1, max_postings, max_len
+        )
+        shards.update(deeper)
+    return {k: v for k, v in shards.items() if v}
+
+
+def shard_stem(key):
+    return key if SAFE_KEY_RE.match(key) else "x" + key.encode("utf-8").hex()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build a static, prefix-sharded inverted index of romn words (diacritic-folded, exact forms kept)."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    parser.add_argument("--prefix-len", type=int, default=2, help="Initial shard prefix length (folded)")
+    parser.add_argument(
+        "--max-postings",
+        type=int,
+        default=60000,
+        help="Split a shard one character deeper when it holds more postings than this",
+    )
+    args = parser.parse_args()
+
+    grouped = leaves_by_file(load_tree())
+    names = [n for n in list_romn_files() if n in grouped]
+
+    started = time.time()
+    files = []
+    forms = defaultdict(lambda: array("i"))
+    blocks = 0
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        for file_name, block_count, sections, postings in pool.map(
+            _index_job, [(n, grouped[n]) for n in names]
+        ):
+            f = len(files)
+            files.append({"n": file_name, "s": sections})
+            blocks += block_count
+            for form, raw in postings.items():
+                pairs = array("i")
+                pairs.frombytes(raw)
+                target = forms[form]
+                for i in range(0, len(pairs), 2):
+                    target.extend((f, pairs[i], pairs[i + 1]))
+            print(f"{file_name}: blocks={block_count} forms={len(postings)}")
+    tokenized = time.time() - started
+
+    by_folded = defaultdict(list)
+    for form in forms:
+        by_folded[fold(form)].append(form)
+    weights = {t: sum(len(forms[f]) // 3 for f in fs) for t, fs in by_folded.items()}
+    shards = partition(weights, args.prefix_len, args.max_postings, args.prefix_len + 4)
+
+    if SEARCH_DIR.exists():
+        shutil.rmtree(SEARCH_DIR)
+    stems = {}
+    for key, members in sorted(shards.items()):
+        stems[key] = shard_stem(key)
+        terms = {
+            t: {form: encode_postings(forms[form]) for form in sorted(by_folded[t])}
+            for t in sorted(members)
+        }
+        write_json(SEARCH_DIR / f"{stems[key]}.json", {"v": 1, "terms": terms})
+    write_json(SEARCH_DIR / "root.json", {"v": 1, "prefix": args.prefix_len, "files": files, "shards": stems})
+
+    postings_total = sum(weights.values())
+    sizes = [(SEARCH_DIR / f"{s}.json").stat().st_size for s in stems.values()]
+    print(
+        f"written: {SEARCH_DIR} ({len(files)} files, {blocks} blocks, {len(by_folded)} folded terms, "
+        f"{len(forms)} forms, {postings_total} postings, {len(stems)} shards, "
+        f"largest shard={max(sizes, default=0)} bytes, root={(SEARCH_DIR / 'root.json').stat().st_size} bytes, "
+        f"tokenize {tokenized:.1f}s, total {time.time() - started:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
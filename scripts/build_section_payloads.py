@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import argparse
+import shutil
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus_blocks import (
+    DERIVED_DIR,
+    ROMN_DIR,
+    canonical_file_name,
+    default_jobs,
+    iter_tree_leaves,
+    load_blocks,
+    load_tree,
+    normalize_section_label,
+    public_block,
+    read_json,
+    section_range,
+    write_json,
+)
+
+
+SECTIONS_DIR = DERIVED_DIR / "sections"
+
+
+def section_id(file_name, start, end):
+    return f"{file_name}/{start}-{end}"
+
+
+def section_path(sid):
+    return SECTIONS_DIR / f"{sid}.json"
+
+
+def leaves_by_file(tree):
+    grouped = defaultdict(list)
+    for href, label in iter_tree_leaves(tree):
+        grouped[canonical_file_name(href)].append((href, label))
+    return grouped
+
+
+def section_refs(items, leaves):
+    # [((start, end), [(href, label), ...]), ...] sorted by range.
+    by_range = defaultdict(list)
+    for href, label in leaves:
+        by_range[section_range(items, label)].append((href, label))
+    return sorted(by_range.items())
+
+
+def block_sections(ranges, count):
+    # Innermost range containing each block ordinal, as an index into ranges (-1 if none).
+    out = [-1] * count
+    span = [count + 1] * count
+    for idx, ((start, end), _) in enumerate(ranges):
+        width = end - start
+        for b in range(start, min(end, count)):
+            if width < span[b]:
+                out[b] = idx
+                span[b] = width
+    return out
+
+
+def build_file_sections(file_name, leaves, items=None):
+    if items is None:
+        items = [public_block(x) for x in load_blocks(ROMN_DIR / file_name)]
+    ranges = section_refs(items, leaves)
+    refs = [
+        (href, normalize_section_label(label), f"{start}-{end}")
+        for (start, end), pairs in ranges
+        for href, label in pairs
+    ]
+
+    out_dir = SECTIONS_DIR / file_name
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    for (start, end), pairs in ranges:
+        write_json(
+            section_path(section_id(file_name, start, end)),
+            {
+                "file": file_name,
+                "start": start,
+                "end": end,
+                "labels": [label for _, label in pairs],
+                "items": items[start:end],
+            },
+        )
+    return file_name, len(items), len(ranges), refs
+
+
+def _build_job(job):
+    return build_file_sections(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Split romn files into per-section payloads at filterBlocksBySection boundaries."
+    )
+    parser.add_argument("--file", action="append", default=[], help="Only this file name (repeatable)")
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    args = parser.parse_args()
+
+    grouped = leaves_by_file(load_tree())
+    names = sorted(n for n in grouped if (ROMN_DIR / n).exists())
+    if args.file:
+        names = [n for n in names if n in set(args.file)]
+
+    index_path = SECTIONS_DIR / "index.json"
+    index = {"v": 1, "hrefs": {}}
+    if args.file:
+        index = read_json(index_path, index)
+
+    started = time.time()
+    payloads = 0
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        for file_name, block_count, section_count, refs in pool.map(
+            _build_job, [(n, grouped[n]) for n in names]
+        ):
+            payloads += section_count
+            for href in {h for h, _, _ in refs}:
+                index["hrefs"].pop(href, None)
+            for href, label_key, slice_name in refs:
+                index["hrefs"].setdefault(href, {})[label_key] = slice_name
+            print(f"{file_name}: blocks={block_count} sections={section_count}")
+
+    write_json(index_path, index)
+    print(
+        f"written: {SECTIONS_DIR} ({len(names)} files, {payloads} sections, "
+        f"{len(index['hrefs'])} hrefs, {time.time() - started:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
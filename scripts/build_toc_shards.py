@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+import argparse
+import shutil
+import sys
+
+from corpus_blocks import (
+    DERIVED_DIR,
+    TREE_PATH,
+    load_tree,
+    map_href_to_corpus_path,
+    normalize_section_label,
+    parse_tree_text,
+    read_json,
+    write_json,
+)
+
+
+TOC_DIR = DERIVED_DIR / "toc"
+
+
+def node_key_part(label, idx):
+    # index.html getNodeKeyPart
+    return normalize_section_label(label) or f"node-{idx}"
+
+
+class ShardBuilder:
+    def __init__(self, shard_depth, ko_hrefs, section_hrefs):
+        self.shard_depth = shard_depth
+        self.ko_hrefs = ko_hrefs
+        self.section_hrefs = section_hrefs
+        self.shards = {}
+
+    def compact(self, nodes, depth, parent_key):
+        out = []
+        for idx, node in enumerate(nodes):
+            label = parse_tree_text(node.get("text") or "Untitled")
+            children = node.get("children") if isinstance(node.get("children"), list) else []
+            if children:
+                key = f"{parent_key}/{node_key_part(label, idx)}"
+                item = {"t": label, "k": key}
+                compact_children = self.compact(children, depth + 1, key)
+                if depth == self.shard_depth:
+                    shard_id = str(node.get("id") or len(self.shards))
+                    self.shards[shard_id] = {"v": 1, "k": key, "c": compact_children}
+                    item["x"] = shard_id
+                else:
+                    item["c"] = compact_children
+                out.append(item)
+                continue
+
+            item = {"t": label}
+            href = map_href_to_corpus_path((node.get("a_attr") or {}).get("href", ""))
+            if href:
+                item["h"] = href
+                label_key = normalize_section_label(label)
+                slice_name = self.section_hrefs.get(href, {}).get(label_key)
+                if slice_name:
+                    item["s"] = slice_name
+                ko = self.ko_hrefs.get(href, {}).get(label_key)
+                if ko and ko[2] != "none":
+                    item["b"] = ko[2]
+            out.append(item)
+        return out
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert data/tree/romn/tree.json into a small UTF-8 root file plus lazily loaded subtree shards."
+    )
+    parser.add_argument(
+        "--shard-depth",
+        type=int,
+        default=2,
+        help="Branch nodes at this depth (root=0) are moved, with their subtrees, into shard files",
+    )
+    args = parser.parse_args()
+
+    status = read_json(DERIVED_DIR / "ko-status.json")
+    sections = read_json(DERIVED_DIR / "sections/index.json")
+    builder = ShardBuilder(
+        args.shard_depth,
+        status.get("hrefs", {}) if status else {},
+        sections.get("hrefs", {}) if sections else {},
+    )
+    root_nodes = builder.compact(load_tree(), 0, "root")
+
+    if TOC_DIR.exists():
+        shutil.rmtree(TOC_DIR)
+    # "ko": badges are baked in, so leaves without "b" are known to be untranslated.
+    write_json(TOC_DIR / "root.json", {"v": 1, "ko": status is not None, "c": root_nodes})
+    for shard_id, shard in builder.shards.items():
+        write_json(TOC_DIR / f"{shard_id}.json", shard)
+
+    root_size = (TOC_DIR / "root.json").stat().st_size
+    shard_sizes = [(TOC_DIR / f"{sid}.json").stat().st_size for sid in builder.shards]
+    print(f"source: {TREE_PATH} ({TREE_PATH.stat().st_size} bytes)")
+    print(
+        f"written: {TOC_DIR} (root={root_size} bytes, shards={len(shard_sizes)}, "
+        f"largest shard={max(shard_sizes, default=0)} bytes, ko badges={'yes' if status else 'no'}, "
+        f"section slices={'yes' if sections else 'no'})"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
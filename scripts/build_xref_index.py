@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import argparse
+import re
+import shutil
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from build_section_payloads import block_sections, leaves_by_file, section_refs
+from corpus_blocks import (
+    DERIVED_DIR,
+    ROMN_DIR,
+    default_jobs,
+    list_romn_files,
+    load_blocks,
+    load_tree,
+    write_json,
+)
+
+
+XREF_DIR = DERIVED_DIR / "xref"
+# s0101m.mul.xml / s0101a.att.xml / s0101t.tik.xml / vin02a3.att.xml -> book "s0101" / "vin02";
+# the trailing digits are the volume (vin02a3 -> 3). Must match xrefBookOf in index.html.
+BOOK_RE = re.compile(r"^([a-z]+\d+)[a-z](\d*)\.(mul|att|tik|nrf)\.xml$")
+ROLE_ORDER = ("mul", "att", "tik", "nrf")
+MAX_RANGE = 500
+
+
+def book_of(file_name):
+    m = BOOK_RE.match(file_name)
+    return (m.group(1), m.group(3)) if m else (None, None)
+
+
+def volume_of(file_name):
+    # vin02m2.mul.xml -> 2; None for a file that holds the whole book (vin02t.tik.xml).
+    m = BOOK_RE.match(file_name)
+    return int(m.group(2)) if m and m.group(2) else None
+
+
+def link_paras(members, parsed):
+    """{key: [[file, section, block], ...]} for one book.
+
+    Multi-volume books restart paragraph numbers per volume (vin02m1 and vin02m2 both have
+    a paragraph 1), so a number is only linked across volumes when a single volume has it.
+    Otherwise each volume links its own files under "<volume>:<number>" (vin02m2 <-> vin02a2)
+    and whole-book files, which cannot tell the volumes apart, drop that number."""
+    by_num = defaultdict(list)
+    for f, name in enumerate(members):
+        vol = volume_of(name)
+        for n, (s, b) in parsed[name][1].items():
+            by_num[n].append((vol, [f, s, b]))
+    paras = {}
+    for n, refs in sorted(by_num.items()):
+        volumes = sorted({vol for vol, _ in refs if vol is not None})
+        if len(volumes) <= 1:
+            groups = [(str(n), [ref for _, ref in refs])]
+        else:
+            groups = [(f"{v}:{n}", [ref for vol, ref in refs if vol == v]) for v in volumes]
+        for key, group in groups:
+            # A paragraph number found in a single file has nothing to point to.
+            if len({ref[0] for ref in group}) > 1:
+                paras[key] = group
+    return paras
+
+
+def expand_paranum(num):
+    # "12" -> [12]; "12-15" -> 12..15 (commentaries often cover a run of root paragraphs).
+    parts = [p for p in num.split("-") if p.isdigit()]
+    if not parts:
+        return []
+    first, last = int(parts[0]), int(parts[-1])
+    if last < first or last - first > MAX_RANGE:
+        return [first]
+    return list(range(first, last + 1))
+
+
+def file_paras(file_name, leaves):
+    # {paranum: (section index, block ordinal)} for the first block carrying each number.
+    items = load_blocks(ROMN_DIR / file_name)
+    ranges = section_refs(items, leaves)
+    owner = block_sections(ranges, len(items))
+    paras = {}
+    for b, item in enumerate(items):
+        if item["type"] != "p" or not item["num"]:
+            continue
+        for n in expand_paranum(item["num"]):
+            paras.setdefault(n, (owner[b], b))
+    sections = [[f"{start}-{end}", pairs[0][0], pairs[0][1]] for (start, end), pairs in ranges]
+    return file_name, sections, paras
+
+
+def _paras_job(job):
+    return file_paras(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cross-reference root texts and their commentaries (mul/att/tik/nrf) by paragraph number."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes")
+    args = parser.parse_args()
+
+    grouped = leaves_by_file(load_tree())
+    books = defaultdict(list)
+    for name in list_romn_files():
+        book, _ = book_of(name)
+        if book and name in grouped:
+            books[book].append(name)
+    # Only books that have more than one layer need a cross-reference.
+    books = {b: names for b, names in books.items() if len({book_of(n)[1] for n in names}) > 1}
+    names = sorted(n for ns in books.values() for n in ns)
+
+    started = time.time()
+    parsed = {}
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        for file_name, sections, paras in pool.map(_paras_job, [(n, grouped[n]) for n in names]):
+            parsed[file_name] = (sections, paras)
+
+    if XREF_DIR.exists():
+        shutil.rmtree(XREF_DIR)
+    links = 0
+    for book, members in sorted(books.items()):
+        members = sorted(members, key=lambda n: (ROLE_ORDER.index(book_of(n)[1]), n))
+        files = [{"n": n, "r": book_of(n)[1], "v": volume_of(n), "s": parsed[n][0]} for n in members]
+        paras = link_paras(members, parsed)
+        links += sum(len(r) for r in paras.values())
+        write_json(XREF_DIR / f"{book}.json", {"v": 2, "book": book, "files": files, "paras": paras})
+        print(f"{book}: files={len(members)} paragraphs={len(paras)}")
+
+    print(f"written: {XREF_DIR} ({len(books)} books, {len(names)} files, {links} links, {time.time() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
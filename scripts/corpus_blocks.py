@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""Python port of the reader's XML block extraction (index.html parseXmlBlocks)."""
+import hashlib
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+CORPUS_DIR = ROOT_DIR / "data/corpus"
+ROMN_DIR = CORPUS_DIR / "romn"
+KO_DIR = CORPUS_DIR / "ko"
+TREE_PATH = ROOT_DIR / "data/tree/romn/tree.json"
+MANIFEST_PATH = ROOT_DIR / "data/manifest.json"
+DERIVED_DIR = ROOT_DIR / "data/derived"
+
+BLOCK_TAGS = {"p", "head", "trailer"}
+
+# index.html parseLooseBlocks: /<(head|p|trailer)\b[^>]*>[\s\S]*?<\/\1>/gi (JS \b is ASCII-only).
+LOOSE_BLOCK_RE = re.compile(r"<(head|p|trailer)\b[^>]*>[\s\S]*?</\1>", re.IGNORECASE | re.ASCII)
+# Python-only: div tags between the loose blocks, for the "div" alignment key.
+LOOSE_DIV_RE = re.compile(r"<div\b[^>]*>|</div\s*>", re.IGNORECASE | re.ASCII)
+DIV_ID_RE = re.compile(r"""\bid\s*=\s*["']([^"']*)["']""")
+
+
+def decode_xml_bytes(raw: bytes):
+    # Like the reader's decodeWithBom (TextDecoder drops the BOM).
+    if raw.startswith(b"\xff\xfe"):
+        return raw[2:].decode("utf-16le"), "utf-16le"
+    if raw.startswith(b"\xfe\xff"):
+        return raw[2:].decode("utf-16be"), "utf-16be"
+    if raw.startswith(b"\xef\xbb\xbf"):
+        return raw[3:].decode("utf-8"), "utf-8"
+    return raw.decode("utf-8"), "utf-8"
+
+
+def compact_text(text: str) -> str:
+    text = re.sub(r"[ \t\r\f\v]+", " ", text)
+    text = re.sub(r"\n+", "\n", text)
+    text = re.sub(r"\s+\n", "\n", text)
+    text = re.sub(r"\n\s+", "\n", text)
+    return text.strip()
+
+
+def parse_tree_text(text) -> str:
+    if not text:
+        return ""
+    return re.sub(r"\s+", " ", str(text).strip())
+
+
+def normalize_section_label(text) -> str:
+    t = parse_tree_text(text or "").lower()
+    t = re.sub(r"^\d+\.\s*", "", t)
+    return re.sub(r"\s+", " ", t).strip()
+
+
+def escape_html(s: str) -> str:
+    return (
+        s.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+        .replace("'", "&#39;")
+    )
+
+
+def node_to_text(node) -> str:
+    tag = node.tag.lower()
+    if tag == "pb":
+        return ""
+    if tag == "lb":
+        return "\n"
+    out = node.text or ""
+    for child in node:
+        out += node_to_text(child)
+        out += child.tail or ""
+    if tag == "note":
+        note = compact_text(out)
+        return f" [{note}] " if note else ""
+    return out
+
+
+def node_to_html(node) -> str:
+    tag = node.tag.lower()
+    if tag == "pb":
+        ed = escape_html(node.get("ed") or "")
+        n = escape_html(node.get("n") or "")
+        if not ed and not n:
+            return ""
+        return f'<a name="{ed}{n}"></a>'
+    if tag == "lb":
+        return "<br>"
+
+    children = escape_html(node.text or "")
+    for child in node:
+        children += node_to_html(child)
+        children += escape_html(child.tail or "")
+
+    if tag == "note":
+        return f'<span class="note">[{children}]</span>'
+    if tag == "hi":
+        rend = (node.get("rend") or "").lower()
+        if rend == "bold":
+            return f'<span class="bld">{children}</span>'
+        if rend == "paranum":
+            return f'<span class="paranum">{children}</span>'
+    return children
+
+
+REND_CLASSES = {
+    "centre": "centered",
+    "center": "centered",
+    "bodytext": "bodytext",
+    "hangnum": "hangnum",
+    "unindented": "unindented",
+    "indent": "indent",
+    "book": "book",
+    "chapter": "chapter",
+    "subhead": "subhead",
+    "subsubhead": "subsubhead",
+    "nikaya": "nikaya",
+    "title": "title",
+    "gatha1": "gatha1",
+    "gatha2": "gatha2",
+    "gatha3": "gatha3",
+    "gathalast": "gathalast",
+}
+
+
+def get_rend_class(tag: str, rend: str) -> str:
+    cls = REND_CLASSES.get(str(rend or "").lower())
+    if cls:
+        return cls
+    if tag == "head":
+        return "chapter"
+    if tag == "trailer":
+        return "centered"
+    return "bodytext"
+
+
+def normalize_paragraph(node):
+    raw = compact_text(node_to_text(node))
+    if not raw:
+        return "", ""
+    num = node.get("n") or ""
+    if not num:
+        for hi in node.iter("hi"):
+            if hi is not node and hi.get("rend") == "paranum":
+                num = compact_text(node_to_text(hi))
+                break
+    text = raw
+    if num:
+        text = re.sub(rf"^{re.escape(num)}\s*\.?\s*", "", text, count=1)
+    return compact_text(num), compact_text(text)
+
+
+def build_block(node, idx: int):
+    tag = node.tag.lower()
+    rend = node.get("rend") or ""
+    trans = (node.get("trans") or "").lower() == "true"
+    html = re.sub(r"\s*<br>\s*", "<br>", compact_text(node_to_html(node)))
+    plain = compact_text(node_to_text(node))
+    if not plain:
+        return None
+    cls = get_rend_class(tag, rend)
+
+    if tag in ("head", "trailer"):
+        return {
+            "type": tag,
+            "num": "",
+            "text": plain,
+            "key": f"{tag}:{idx}",
+            "rend": rend,
+            "cls": cls,
+            "html": html,
+            "trans": trans,
+        }
+
+    num, text = normalize_paragraph(node)
+    return {
+        "type": "p",
+        "num": num,
+        "text": text,
+        "key": f"p:n:{num}" if num else f"p:i:{idx}",
+        "rend": rend,
+        "cls": cls,
+        "html": html,
+        "trans": trans,
+    }
+
+
+def _append_block(items, node, div_id):
+    item = build_block(node, len(items))
+    if item:
+        item["div"] = div_id
+        items.append(item)
+
+
+def select_blocks(root, fragment=False):
+    """(node, div id) in document order, as the reader's querySelectorAll picks them.
+
+    Document (parseXmlBlocks): `text body > p|head|trailer, text body div > p|head|trailer`.
+    Fragment (parseXmlFragmentBlocks): every p/head/trailer under the wrapper root.
+    Selectors compare tag names case-sensitively, as CSS does in XML documents. The div id is
+    Python-only (alignment keys): the nearest enclosing div that has one."""
+    found = []
+
+    def visit(node, in_text, in_body, div_id):
+        name = node.tag
+        if name == "div":
+            div_id = node.get("id") or div_id
+        for child in node:
+            tag = child.tag
+            if not isinstance(tag, str):
+                continue
+            if tag.startswith("{"):
+                # ElementTree drops namespace prefixes, so build_block could not reproduce the
+                # browser's tagName for these; the corpus has no namespaced elements.
+                raise ValueError(f"namespaced element not supported: {tag}")
+            if tag in BLOCK_TAGS and (
+                fragment or (name == "body" and in_text) or (name == "div" and in_body)
+            ):
+                found.append((child, div_id))
+            visit(child, in_text or name == "text", in_body or (name == "body" and in_text), div_id)
+
+    visit(root, False, False, "")
+    return found
+
+
+def parse_xml_blocks(xml_text: str):
+    # index.html parseXmlBlocks on decodeWithBom text; the declared encoding is ignored, as in the browser.
+    items = []
+    for node, div_id in select_blocks(ET.fromstring(xml_text)):
+        _append_block(items, node, div_id)
+    return items
+
+
+def parse_fragment_blocks(xml_text: str):
+    # index.html parseXmlFragmentBlocks: the text wrapped in <root>...</root>.
+    items = []
+    for node, div_id in select_blocks(ET.fromstring(f"<root>{xml_text}</root>"), fragment=True):
+        _append_block(items, node, div_id)
+    return items
+
+
+def parse_loose_blocks(xml_text: str):
+    # index.html parseLooseBlocks: regex-matched blocks parsed one by one, unparsable ones skipped.
+    # Div tags outside the matched blocks only feed the Python-only div id.
+    tokens = [(m.start(), m) for m in LOOSE_BLOCK_RE.finditer(xml_text)]
+    spans = [(m.start(), m.end()) for _, m in tokens]
+    span_idx = 0
+    for m in LOOSE_DIV_RE.finditer(xml_text):
+        while span_idx < len(spans) and spans[span_idx][1] <= m.start():
+            span_idx += 1
+        if span_idx < len(spans) and spans[span_idx][0] <= m.start():
+            continue
+        tokens.append((m.start(), m))
+    tokens.sort(key=lambda t: t[0])
+
+    items = []
+    div_stack = []
+    for _, m in tokens:
+        token = m.group(0)
+        if m.re is LOOSE_DIV_RE:
+            if token.startswith("</"):
+                if div_stack:
+                    div_stack.pop()
+            else:
+                id_m = DIV_ID_RE.search(token)
+                div_stack.append(id_m.group(1) if id_m else (div_stack[-1] if div_stack else ""))
+            continue
+        try:
+            node = ET.fromstring(f"<root>{token}</root>")[0]
+        except ET.ParseError:
+            continue
+        _append_block(items, node, div_stack[-1] if div_stack else "")
+    return items
+
+
+def load_blocks(path: Path):
+    """Romn blocks as index.html loadRomnBlocks reads them: parseXmlBlocks only, no fallback."""
+    xml_text, _ = decode_xml_bytes(Path(path).read_bytes())
+    return parse_xml_blocks(xml_text)
+
+
+def load_ko_blocks(path: Path):
+    """Ko blocks as index.html loadMergedItemsForPath reads them: the document, then the
+    fragment, then the loose regex parse. Empty loose output is an error, as in the reader."""
+    xml_text, _ = decode_xml_bytes(Path(path).read_bytes())
+    try:
+        return parse_xml_blocks(xml_text)
+    except ET.ParseError:
+        pass
+    try:
+        return parse_fragment_blocks(xml_text)
+    except ET.ParseError:
+        pass
+    items = parse_loose_blocks(xml_text)
+    if not items:
+        raise ValueError(f"no blocks found: {path}")
+    return items
+
+
+def has_para_num(item) -> bool:
+    if not item or item.get("type") != "p":
+        return False
+    return re.match(r"^\d+", parse_tree_text(item.get("num") or "")) is not None
+
+
+def block_shape_sig(items) -> str:
+    # index.html blockShapeSig: FNV-1a (32-bit) over UTF-16 code units of each block's
+    # type/rend/num, so a prebuilt alignment is only trusted for the block layout it was built from.
+    h = 0x811C9DC5
+    for item in items:
+        part = f"{item.get('type') or ''}\x01{item.get('rend') or ''}\x01{item.get('num') or ''}\x02"
+        data = part.encode("utf-16-le")
+        for i in range(0, len(data), 2):
+            h ^= data[i] | (data[i + 1] << 8)
+            h = (h * 0x01000193) & 0xFFFFFFFF
+    return f"{h:08x}"
+
+
+def translation_stats(items):
+    # index.html getTranslationStats
+    counted = [x for x in items if has_para_num(x)]
+    translated = sum(1 for x in counted if x.get("koTrans") is True)
+    return translated, len(counted)
+
+
+def ko_state(items, translated, total):
+    if total > 0:
+        if translated == 0:
+            return "none"
+        return "full" if translated >= total else "partial"
+    if any(x.get("koTrans") is True for x in items):
+        return "partial"
+    return "none"
+
+
+def public_block(item):
+    return {k: v for k, v in item.items() if k != "div"}
+
+
+def alignment_keys(items):
+    # (div id, last paranum seen in that div, ordinal since that paranum).
+    keys = []
+    anchor_by_div = {}
+    seen = {}
+    for item in items:
+        div_id = item.get("div", "")
+        if has_para_num(item):
+            anchor_by_div[div_id] = item["num"]
+        anchor = anchor_by_div.get(div_id, "")
+        base = (div_id, anchor)
+        ordinal = seen.get(base, 0)
+        seen[base] = ordinal + 1
+        keys.append(f"{div_id}|{anchor}|{ordinal}")
+    return keys
+
+
+def map_href_to_corpus_path(href) -> str:
+    if not href or not str(href).lower().endswith(".xml"):
+        return ""
+    p = re.sub(r"^/+", "", str(href).strip())
+    return re.sub(r"^\./", "", p)
+
+
+def load_tree(path: Path = TREE_PATH):
+    text, _ = decode_xml_bytes(Path(path).read_bytes())
+    data = json.loads(text)
+    return data if isinstance(data, list) else []
+
+
+def iter_tree_leaves(nodes):
+    # (corpus href, label) for every leaf, in renderTreeNodes order.
+    for node in nodes:
+        children = node.get("children") if isinstance(node.get("children"), list) else []
+        if children:
+            yield from iter_tree_leaves(children)
+            continue
+        href = map_href_to_corpus_path((node.get("a_attr") or {}).get("href", ""))
+        if href:
+            yield href, parse_tree_text(node.get("text") or "Untitled")
+
+
+def section_range(items, section_label):
+    # Port of index.html filterBlocksBySection; returns the [start, end) slice.
+    if not items or not section_label:
+        return 0, len(items)
+    target = normalize_section_label(section_label)
+    if not target:
+        return 0, len(items)
+    start = next(
+        (i for i, x in enumerate(items) if x["type"] == "head" and normalize_section_label(x["text"]) == target),
+        -1,
+    )
+    if start < 0:
+        return 0, len(items)
+
+    # Keep front-matter when the selected section is the first chapter in the document.
+    first_chapter = next(
+        (i for i, x in enumerate(items) if x["type"] == "head" and x["rend"] == "chapter"),
+        -1,
+    )
+    include_leading = first_chapter >= 0 and start == first_chapter
+
+    end = len(items)
+    for i in range(start + 1, len(items)):
+        if items[i]["type"] == "head" and items[i]["rend"] == "chapter":
+            end = i
+            break
+    return (0 if include_leading else start), end
+
+
+def list_romn_files():
+    # data/manifest.json lists the real corpus files; romn/ also holds scratch copies.
+    if MANIFEST_PATH.exists():
+        names = json.loads(MANIFEST_PATH.read_text(encoding="utf-8")).get("romn", [])
+        return sorted(n for n in names if (ROMN_DIR / n).exists())
+    return sorted(p.name for p in ROMN_DIR.glob("*.xml"))
+
+
+def ko_path_for(file_name: str) -> Path:
+    return KO_DIR / file_name
+
+
+def canonical_file_name(href: str) -> str:
+    name = str(href or "").split("/")[-1]
+    return re.sub(r"(\.[a-z]+)\d+\.xml$", r"\1.xml", name, flags=re.IGNORECASE)
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def default_jobs() -> int:
+    return max(os.cpu_count() or 1, 1)
+
+
+def write_json(path: Path, obj):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(obj, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    tmp.replace(path)
+
+
+def read_json(path: Path, default=None):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+import argparse
+import glob
+import heapq
+import json
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from build_alignment_index import build_alignment
+from build_section_payloads import block_sections, leaves_by_file, section_refs
+from corpus_blocks import (
+    KO_DIR,
+    ROMN_DIR,
+    ROOT_DIR,
+    build_block,
+    default_jobs,
+    list_romn_files,
+    load_ko_blocks,
+    load_tree,
+    select_blocks,
+)
+from translate_one_xml_with_codex import is_translatable, split_paragraph_to_pieces
+
+
+DEFAULT_HISTORY = [
+    "data/translated/**/*.progress.log",
+    "data/translated/**/*.metrics.jsonl",
+    "data/corpus/ko/**/*.progress.log",
+    "data/corpus/ko/**/*.metrics.jsonl",
+]
+# Romanized Pali averages roughly 3 characters per token with current BPE tokenizers.
+DEFAULT_CHARS_PER_TOKEN = 3.0
+BATCH_LINE_RE = re.compile(r"\[batch (\d+)/(\d+)\].*\| items=(\d+) \| chars=(\d+)")
+DONE_LINE_RE = re.compile(r"-> batch done (\d+)/(\d+) .*\| batch_time=([\d:]+)")
+
+
+def slot_stats(elem, max_batch_chars):
+    # Same slots as collect_text_nodes: every translatable text/tail, skipping <pb> subtrees.
+    slots = 0
+    chars = 0
+    pieces = []
+
+    def add(text):
+        nonlocal slots, chars
+        if text and is_translatable(text):
+            slots += 1
+            chars += len(text)
+            pieces.extend(len(p) for p in (split_paragraph_to_pieces(text, max_batch_chars) or [text]))
+
+    def walk(el):
+        add(el.text)
+        for child in el:
+            if child.tag.lower() != "pb":
+                walk(child)
+            add(child.tail)
+
+    walk(elem)
+    return slots, chars, pieces
+
+
+def count_batches(piece_lengths, max_batch_chars):
+    # build_batches: greedy packing of items in order up to max_batch_chars.
+    batches = 0
+    current = 0
+    for n in piece_lengths:
+        if current and current + n > max_batch_chars:
+            batches += 1
+            current = 0
+        current += n
+    return batches + (1 if current else 0)
+
+
+def file_workload(file_name, leaves, max_batch_chars):
+    raw = (ROMN_DIR / file_name).read_bytes()
+    root = ET.fromstring(raw)
+    file_slots, file_chars, _ = slot_stats(root, max_batch_chars)
+
+    # Blocks in parse_xml_blocks order, so sections and ko alignment line up with the reader.
+    items = []
+    per_block = []
+    for node, div_id in select_blocks(root):
+        item = build_block(node, len(items))
+        if item:
+            item["div"] = div_id
+            items.append(item)
+            per_block.append(slot_stats(node, max_batch_chars))
+
+    ko_path = KO_DIR / file_name
+    if ko_path.exists():
+        ko_items = load_ko_blocks(ko_path)
+        ko_map = build_alignment(items, ko_items)["map"]
+        done = [k >= 0 and bool(ko_items[k]["trans"]) for k in ko_map]
+    else:
+        done = [False] * len(items)
+
+    ranges = section_refs(items, leaves) if leaves else []
+    owner = block_sections(ranges, len(items))
+    sections = [
+        {"slice": f"{start}-{end}", "label": pairs[0][1], "slots": 0, "chars": 0, "remaining_slots": 0, "remaining_chars": 0}
+        for (start, end), pairs in ranges
+    ]
+    remaining_pieces = []
+    remaining_slots = remaining_chars = 0
+    block_slots = block_chars = 0
+    for b, (slots, chars, pieces) in enumerate(per_block):
+        block_slots += slots
+        block_chars += chars
+        sec = sections[owner[b]] if owner[b] >= 0 else None
+        if sec:
+            sec["slots"] += slots
+            sec["chars"] += chars
+        if done[b]:
+            continue
+        remaining_slots += slots
+        remaining_chars += chars
+        remaining_pieces.extend(pieces)
+        if sec:
+            sec["remaining_slots"] += slots
+            sec["remaining_chars"] += chars
+    if not ko_path.exists():
+        # Header/front matter outside the body blocks is only translated when starting a file from scratch.
+        remaining_slots += file_slots - block_slots
+        remaining_chars += file_chars - block_chars
+
+    return {
+        "file": file_name,
+        "has_ko": ko_path.exists(),
+        "slots": file_slots,
+        "chars": file_chars,
+        "remaining_slots": remaining_slots,
+        "remaining_chars": remaining_chars,
+        "remaining_batches": count_batches(remaining_pieces, max_batch_chars),
+        "sections": sections,
+    }
+
+
+def _workload_job(job):
+    return file_workload(*job)
+
+
+def parse_clock(text):
+    secs = 0
+    for part in text.split(":"):
+        secs = secs * 60 + int(part)
+    return secs
+
+
+def parse_ts(text):
+    try:
+        return datetime.strptime(text, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def read_run_batches(path):
+    """Finished batches of one run as dicts (ts, model, items, chars, seconds, retries, done, total),
+    from its *.metrics.jsonl or, for older runs, its *.progress.log."""
+    path = Path(path)
+    batches = []
+    if path.name.endswith(".metrics.jsonl"):
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if r.get("batch_s"):
+                    batches.append(
+                        {
+                            "ts": parse_ts(r.get("ts")),
+                            "model": r.get("model") or "",
+                            "items": r.get("items", 0),
+                            "chars": r["chars"],
+                            "seconds": r["batch_s"],
+                            "retries": r.get("retries", 0),
+                            "done": r.get("done"),
+                            "total": r.get("total"),
+                        }
+                    )
+        return batches
+
+    pending = None
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            m = BATCH_LINE_RE.search(line)
+            if m:
+                pending = (int(m.group(3)), int(m.group(4)))
+                continue
+            m = DONE_LINE_RE.search(line)
+            if m and pending is not None:
+                seconds = parse_clock(m.group(3))
+                if seconds > 0:
+                    batches.append(
+                        {
+                            "ts": parse_ts(line[1:21]),
+                            "model": "",
+                            "items": pending[0],
+                            "chars": pending[1],
+                            "seconds": seconds,
+                            "retries": 0,
+                            "done": int(m.group(1)),
+                            "total": int(m.group(2)),
+                        }
+                    )
+                pending = None
+    return batches
+
+
+def history_paths(patterns):
+    paths = set()
+    for pattern in patterns:
+        base = pattern if Path(pattern).is_absolute() else str(ROOT_DIR / pattern)
+        paths.update(glob.glob(base, recursive=True))
+    # A progress log is skipped when its run also wrote a metrics file (same output prefix).
+    return [
+        p
+        for p in sorted(paths)
+        if not (p.endswith(".progress.log") and Path(p[: -len(".progress.log")] + ".metrics.jsonl").exists())
+    ]
+
+
+def read_history(patterns):
+    """[(model, chars, seconds, retries)] per finished batch from *.metrics.jsonl and *.progress.log."""
+    return [
+        (b["model"], b["chars"], b["seconds"], b["retries"])
+        for path in history_paths(patterns)
+        for b in read_run_batches(path)
+    ]
+
+
+def history_rates(batches, model=None):
+    picked = [b for b in batches if model is None or b[0] == model]
+    chars = sum(b[1] for b in picked)
+    seconds = sum(b[2] for b in picked)
+    return {
+        "batches": len(picked),
+        "chars_per_sec": chars / seconds if seconds else None,
+        "seconds_per_request": seconds / len(picked) if picked else None,
+        "retries_per_batch": sum(b[3] for b in picked) / len(picked) if picked else 0.0,
+    }
+
+
+def makespan(durations, workers):
+    # Longest-processing-time-first: files are independent runs, each engine works one file at a time.
+    heap = [0.0] * max(workers, 1)
+    for d in sorted(durations, reverse=True):
+        heapq.heapreplace(heap, heap[0] + d)
+    return max(heap) if heap else 0.0
+
+
+def format_hours(seconds):
+    if seconds is None:
+        return "-"
+    return f"{seconds / 3600:.1f}h"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Forecast translation work per romn file and section: slots, chars, tokens, requests and wall time."
+    )
+    parser.add_argument("--jobs", type=int, default=default_jobs(), help="Worker processes for the scan")
+    parser.add_argument("--file", action="append", default=[], help="Only this romn file (repeatable)")
+    parser.add_argument("--max-batch-chars", type=int, default=5000, help="Batch size the engine will run with")
+    parser.add_argument("--chars-per-token", type=float, default=DEFAULT_CHARS_PER_TOKEN, help="Token estimate divisor")
+    parser.add_argument("--history", action="append", default=[], help="Progress log / metrics JSONL glob (repeatable)")
+    parser.add_argument("--model", default=None, help="Use only history recorded for this model")
+    parser.add_argument("--chars-per-sec", type=float, default=None, help="Override the historical rate")
+    parser.add_argument("--workers", type=int, default=1, help="Files translated in parallel for the corpus forecast")
+    parser.add_argument("--sort", choices=("remaining", "name", "chars"), default="remaining", help="Table order")
+    parser.add_argument("--top", type=int, default=30, help="Rows to print (0 = all)")
+    parser.add_argument("--sections", action="store_true", help="Also print sections of the listed files")
+    parser.add_argument("--json", default="", help="Write the full forecast as JSON")
+    args = parser.parse_args()
+
+    started = time.time()
+    grouped = leaves_by_file(load_tree())
+    names = args.file or list_romn_files()
+    with ProcessPoolExecutor(max_workers=max(args.jobs, 1)) as pool:
+        jobs = [(n, grouped.get(n, []), args.max_batch_chars) for n in names]
+        files = list(pool.map(_workload_job, jobs))
+    scan_time = time.time() - started
+
+    history = read_history(args.history or DEFAULT_HISTORY)
+    rates = history_rates(history, args.model)
+    cps = args.chars_per_sec or rates["chars_per_sec"]
+    retry_factor = 1.0 + rates["retries_per_batch"]
+    for f in files:
+        f["tokens"] = round(f["chars"] / args.chars_per_token)
+        f["remaining_tokens"] = round(f["remaining_chars"] / args.chars_per_token)
+        f["requests"] = round(f["remaining_batches"] * retry_factor)
+        f["wall_s"] = round(f["remaining_chars"] / cps) if cps else None
+        for sec in f["sections"]:
+            sec["wall_s"] = round(sec["remaining_chars"] / cps) if cps else None
+
+    total_remaining = sum(f["remaining_chars"] for f in files)
+    durations = [f["wall_s"] for f in files if f["wall_s"]]
+    summary = {
+        "files": len(files),
+        "slots": sum(f["slots"] for f in files),
+        "chars": sum(f["chars"] for f in files),
+        "remaining_chars": total_remaining,
+        "remaining_tokens": round(total_remaining / args.chars_per_token),
+        "requests": sum(f["requests"] for f in files),
+        "chars_per_sec": round(cps, 2) if cps else None,
+        "rate_source": "override" if args.chars_per_sec else f"{rates['batches']} historical batches",
+        "retries_per_batch": round(rates["retries_per_batch"], 3),
+        "workers": args.workers,
+        "wall_s_serial": round(sum(durations)) if cps else None,
+        "wall_s": round(makespan(durations, args.workers)) if cps else None,
+    }
+
+    key = {
+        "remaining": lambda f: -f["remaining_chars"],
+        "name": lambda f: f["file"],
+        "chars": lambda f: -f["chars"],
+    }[args.sort]
+    rows = sorted(files, key=key)
+    shown = rows if args.top == 0 else rows[: args.top]
+    print(f"{'file':<22}{'slots':>8}{'chars':>10}{'left':>10}{'tokens':>9}{'reqs':>7}{'wall':>8}")
+    for f in shown:
+        print(
+            f"{f['file']:<22}{f['slots']:>8}{f['chars']:>10}{f['remaining_chars']:>10}"
+            f"{f['remaining_tokens']:>9}{f['requests']:>7}{format_hours(f['wall_s']):>8}"
+        )
+        if args.sections:
+            for sec in f["sections"]:
+                if sec["remaining_chars"]:
+                    print(f"    {sec['slice']:<14}{sec['label'][:40]:<42}{sec['remaining_chars']:>9} chars {format_hours(sec['wall_s']):>7}")
+    if len(rows) > len(shown):
+        print(f"... {len(rows) - len(shown)} more (--top 0 for all)")
+
+    rate = f"{summary['chars_per_sec']} chars/s ({summary['rate_source']})" if cps else "no rate (no history; pass --chars-per-sec)"
+    print(
+        f"\nremaining: {total_remaining} chars, ~{summary['remaining_tokens']} input tokens, "
+        f"~{summary['requests']} requests (x{retry_factor:.2f} retries) | {rate}"
+    )
+    if cps:
+        print(
+            f"forecast: {format_hours(summary['wall_s_serial'])} serial, "
+            f"{format_hours(summary['wall_s'])} with {args.workers} workers (one file per worker)"
+        )
+    print(f"scan: {len(files)} files in {scan_time:.1f}s")
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps({"v": 1, "summary": summary, "files": files}, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8",
+        )
+        print(f"written: {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
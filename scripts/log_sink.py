@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+import atexit
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+DEFAULT_FLUSH_BYTES = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 3
+
+_CLOSE = object()
+_FLUSH = object()
+_open_sinks = []
+_previous_handlers = {}
+_signals_installed = False
+
+
+class LogSink:
+    """Append-only line log written by a background thread.
+
+    write() only enqueues, so callers never block on the file or the terminal. The writer
+    keeps the file open and flushes when flush_bytes are buffered or flush_interval
+    seconds have passed, whichever comes first. With max_bytes > 0 the file rotates to
+    .1 .. .N (N = backups) before it would grow past max_bytes. echo=True also prints each
+    line to stdout from the writer thread.
+
+    Pending lines are flushed on close(), at interpreter exit and on SIGTERM/SIGHUP. A hard
+    kill (SIGKILL, os._exit) loses at most the last flush_interval of lines."""
+
+    def __init__(
+        self,
+        path,
+        echo=False,
+        flush_bytes=DEFAULT_FLUSH_BYTES,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        max_bytes=0,
+        backups=DEFAULT_BACKUPS,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.echo = echo
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.queue = queue.SimpleQueue()
+        self.closed = False
+        self.flushed = threading.Condition()
+        self.flush_seq = 0
+        self.thread = threading.Thread(target=self._run, name=f"log-sink {self.path.name}", daemon=True)
+        self.thread.start()
+        _open_sinks.append(self)
+        _install_exit_hooks()
+
+    def write(self, line: str):
+        if not self.closed:
+            self.queue.put(line)
+
+    def flush(self, timeout=5.0):
+        """Block until everything written so far is on disk."""
+        if self.closed:
+            return
+        with self.flushed:
+            target = self.flush_seq + 1
+            self.queue.put(_FLUSH)
+            self.flushed.wait_for(lambda: self.flush_seq >= target or not self.thread.is_alive(), timeout)
+
+    def close(self, timeout=5.0):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(_CLOSE)
+        self.thread.join(timeout)
+        if self in _open_sinks:
+            _open_sinks.remove(self)
+
+    def _rotate(self, f):
+        f.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        return self.path.open("a", encoding="utf-8")
+
+    def _run(self):
+        f = self.path.open("a", encoding="utf-8")
+        size = f.tell()
+        buf = []
+        buf_bytes = 0
+        last_flush = time.monotonic()
+
+        def drain():
+            nonlocal f, size, buf, buf_bytes, last_flush
+            if buf:
+                chunk = "".join(buf)
+                n = len(chunk.encode("utf-8"))
+                if self.max_bytes > 0 and size > 0 and size + n > self.max_bytes:
+                    f = self._rotate(f)
+                    size = 0
+                f.write(chunk)
+                f.flush()
+                size += n
+                if self.echo:
+                    sys.stdout.write(chunk)
+                    sys.stdout.flush()
+                buf = []
+                buf_bytes = 0
+            last_flush = time.monotonic()
+
+        try:
+            while True:
+                wait = max(self.flush_interval - (time.monotonic() - last_flush), 0.0) if buf else None
+                try:
+                    item = self.queue.get(timeout=wait)
+                except queue.Empty:
+                    drain()
+                    continue
+                if item is _CLOSE:
+                    drain()
+                    return
+                if item is _FLUSH:
+                    drain()
+                    with self.flushed:
+                        self.flush_seq += 1
+                        self.flushed.notify_all()
+                    continue
+                line = item + "\n"
+                buf.append(line)
+                buf_bytes += len(line)
+                if buf_bytes >= self.flush_bytes:
+                    drain()
+        finally:
+            f.close()
+
+
+def close_all():
+    for sink in list(_open_sinks):
+        sink.close()
+
+
+def _on_signal(signum, frame):
+    close_all()
+    previous = _previous_handlers.get(signum)
+    if callable(previous):
+        previous(signum, frame)
+        return
+    # Default action for SIGTERM/SIGHUP is to die; exit instead so atexit hooks (trace, profile) still run.
+    sys.exit(128 + signum)
+
+
+def _install_exit_hooks():
+    global _signals_installed
+    if _signals_installed:
+        return
+    _signals_installed = True
+    atexit.register(close_all)
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for name in ("SIGTERM", "SIGHUP"):
+        signum = getattr(signal, name, None)
+        if signum is None:
+            continue
+        previous = signal.getsignal(signum)
+        if previous is signal.SIG_IGN:
+            continue
+        _previous_handlers[signum] = previous
+        signal.signal(signum, _on_signal)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Seconds to keep /metrics up after a run fails: a little over two default 15s scrape intervals.
+DEFAULT_METRICS_LINGER = 35.0
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _seconds(value):
+    return round(value, 1) if value is not None and math.isfinite(value) else -1
+
+
+class TranslationMetrics:
+    """Thread-safe run counters rendered in the Prometheus text format.
+
+    Per-file progress, rate and ETA are read from the engine's ProgressTracker for each
+    file (add_file); the engine thread also calls batch_started/batch_finished/batch_failed
+    for the run counters and finish() when the run is over. The HTTP thread only calls render()."""
+
+    def __init__(self, model=""):
+        self.model = model or ""
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.files = {}
+        self.in_flight = 0
+        self.batches_done = 0
+        self.errors = 0
+        self.retries = 0
+        self.mismatches = 0
+        self.backend_errors = 0
+        self.throttle = None
+        self.slept = 0.0
+        self.running = True
+        self.last_progress = self.started
+
+    def add_file(self, file_name, tracker):
+        with self.lock:
+            self.files[file_name] = tracker
+
+    def batch_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def batch_finished(self, retries=0, mismatches=0):
+        with self.lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            self.batches_done += 1
+            self.retries += retries
+            self.mismatches += mismatches
+            self.last_progress = time.time()
+
+    def batch_failed(self):
+        with self.lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            self.errors += 1
+
+    def backend_failed(self):
+        # One backend call raised; the caller may still retry it.
+        with self.lock:
+            self.backend_errors += 1
+
+    def set_throttle(self, seconds):
+        with self.lock:
+            self.throttle = seconds
+
+    def add_sleep(self, seconds):
+        with self.lock:
+            self.slept += seconds
+
+    def finish(self):
+        with self.lock:
+            self.running = False
+            self.in_flight = 0
+
+    def render(self):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        with self.lock:
+            base = {"model": self.model}
+            per_file = sorted(self.files.items())
+            # Files are translated one after another, so run ETAs add up.
+            etas = [t.eta() for _, t in per_file]
+            known = [e for e in etas if e is not None]
+            eta = [sum(e[i] for e in known) if known and len(known) == len(etas) else None for i in range(3)]
+            rate = sum(t.rate or 0.0 for _, t in per_file)
+            metric("translate_items_done", "gauge", "Items translated so far.",
+                   [({**base, "file": n}, t.done_items) for n, t in per_file])
+            metric("translate_items_remaining", "gauge", "Items left to translate.",
+                   [({**base, "file": n}, t.remaining_items) for n, t in per_file])
+            metric("translate_chars_remaining", "gauge", "Source characters left to translate.",
+                   [({**base, "file": n}, t.remaining_chars) for n, t in per_file])
+            metric("translate_batches_in_flight", "gauge", "Batches sent and not yet answered.", [(base, self.in_flight)])
+            metric("translate_batches_total", "counter", "Batches finished.", [(base, self.batches_done)])
+            metric("translate_errors_total", "counter", "Batches that failed.", [(base, self.errors)])
+            metric("translate_backend_errors_total", "counter", "Backend calls that raised, retried or not.",
+                   [(base, self.backend_errors)])
+            metric("translate_retries_total", "counter", "Extra backend calls made by split retries.", [(base, self.retries)])
+            metric("translate_mismatches_total", "counter", "Backend answers with the wrong item count.", [(base, self.mismatches)])
+            metric("translate_chars_per_second", "gauge", "Exponentially weighted source chars/sec per batch.",
+                   [(base, round(rate, 3))])
+            metric("translate_eta_seconds", "gauge", "Remaining chars / weighted rate (-1 while unknown).",
+                   [(base, _seconds(eta[1]))])
+            metric("translate_eta_low_seconds", "gauge", "Lower 90% bound of the ETA (-1 while unknown).",
+                   [(base, _seconds(eta[0]))])
+            metric("translate_eta_high_seconds", "gauge", "Upper 90% bound of the ETA (-1 while unknown or unbounded).",
+                   [(base, _seconds(eta[2]))])
+            metric("translate_last_progress_timestamp_seconds", "gauge", "Unix time of the last finished batch.",
+                   [(base, round(self.last_progress, 3))])
+            metric("translate_started_timestamp_seconds", "gauge", "Unix time the run started.", [(base, round(self.started, 3))])
+            metric("translate_running", "gauge", "1 while batches are being sent, 0 once the run has ended.",
+                   [(base, 1 if self.running else 0)])
+            if self.throttle is not None:
+                metric("translate_throttle_seconds", "gauge", "Configured pause between batches (--sleep-seconds).",
+                       [(base, self.throttle)])
+            metric("translate_sleep_seconds_total", "counter", "Seconds spent sleeping: throttle and retry backoff.",
+                   [(base, round(self.slept, 3))])
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics = None
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve_metrics(metrics, port, bind="127.0.0.1"):
+    """Serve GET /metrics from a daemon thread; returns the server (call shutdown() to stop)."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"metrics": metrics})
+    server = ThreadingHTTPServer((bind, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""--profile cpu|mem for the translator scripts, and a runner for scripts without the flag.
+
+    python3 scripts/profiling.py --profile mem --mem-interval 60 scripts/archive/translate_vin01_trans_batches.py --items 20
+"""
+import argparse
+import cProfile
+import io
+import pstats
+import runpy
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+
+
+TRACEBACK_FRAMES = 10
+
+
+def add_profile_args(parser):
+    parser.add_argument("--profile", choices=("cpu", "mem"), default=None, help="cpu: cProfile; mem: tracemalloc snapshots")
+    parser.add_argument("--profile-out", default=None, help="Output prefix for profile files")
+    parser.add_argument("--profile-top", type=int, default=25, help="Entries in the printed summary")
+
+
+class RunProfiler:
+    """cpu: cProfile over start()..stop(), written as <prefix>.prof (pstats) and <prefix>.cpu.txt.
+    mem: tracemalloc snapshots at snapshot(label) calls, written as <prefix>.mem.txt with the top
+    allocation sites per snapshot and the growth between consecutive snapshots.
+    With mode None every method is a no-op."""
+
+    def __init__(self, mode, out_prefix, top=25):
+        self.mode = mode
+        self.out_prefix = Path(out_prefix)
+        self.top = top
+        self.profile = None
+        self.snapshots = []
+        self.stopped = False
+        self.lock = threading.Lock()
+
+    def start(self):
+        if self.mode == "cpu":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        elif self.mode == "mem":
+            tracemalloc.start(TRACEBACK_FRAMES)
+
+    def snapshot(self, label):
+        if self.mode != "mem" or not tracemalloc.is_tracing():
+            return
+        snap = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        with self.lock:
+            self.snapshots.append((label, snap, current, peak))
+
+    def stop(self):
+        if self.stopped or self.mode is None:
+            return
+        self.stopped = True
+        self.out_prefix.parent.mkdir(parents=True, exist_ok=True)
+        if self.mode == "cpu":
+            self.profile.disable()
+            prof_path = self.out_prefix.with_name(self.out_prefix.name + ".prof")
+            self.profile.dump_stats(prof_path)
+            buf = io.StringIO()
+            stats = pstats.Stats(self.profile, stream=buf).strip_dirs()
+            stats.sort_stats("cumulative").print_stats(self.top)
+            stats.sort_stats("tottime").print_stats(self.top)
+            report = buf.getvalue()
+            txt_path = self.out_prefix.with_name(self.out_prefix.name + ".cpu.txt")
+            txt_path.write_text(report, encoding="utf-8")
+            print(report, file=sys.stderr)
+            print(f"profile: {prof_path} (pstats), {txt_path}", file=sys.stderr)
+            return
+
+        if not self.snapshots or self.snapshots[-1][0] != "end":
+            # Interrupted or failed run: the engine never reached its own "end".
+            self.snapshot("end")
+        tracemalloc.stop()
+        out = io.StringIO()
+        prev = None
+        for label, snap, current, peak in self.snapshots:
+            out.write(f"== {label}: traced {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n")
+            for stat in snap.statistics("lineno")[: self.top]:
+                out.write(f"  {stat}\n")
+            if prev is not None:
+                out.write(f"-- growth since {prev[0]}\n")
+                for stat in snap.compare_to(prev[1], "lineno")[: self.top]:
+                    out.write(f"  {stat}\n")
+            out.write("\n")
+            prev = (label, snap)
+        if self.snapshots:
+            label, snap, _, _ = self.snapshots[-1]
+            out.write(f"== largest allocation tracebacks at {label}\n")
+            for stat in snap.statistics("traceback")[:3]:
+                out.write(f"  {stat.count} blocks, {stat.size / 1e6:.1f} MB\n")
+                for line in stat.traceback.format():
+                    out.write(f"    {line}\n")
+        report = out.getvalue()
+        txt_path = self.out_prefix.with_name(self.out_prefix.name + ".mem.txt")
+        txt_path.write_text(report, encoding="utf-8")
+        print(report, file=sys.stderr)
+        print(f"profile: {txt_path}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a Python script under --profile cpu|mem (for translator scripts without the flag, e.g. archive/)."
+    )
+    add_profile_args(parser)
+    parser.add_argument("--mem-interval", type=float, default=0.0, help="mem: also snapshot every N seconds (keeps the latest as 'mid')")
+    parser.add_argument("script", help="Script path")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Script arguments")
+    args = parser.parse_args()
+    if not args.profile:
+        parser.error("--profile is required")
+
+    script = Path(args.script)
+    prefix = args.profile_out or f"{script.stem}.profile"
+    profiler = RunProfiler(args.profile, prefix, args.profile_top)
+    done = threading.Event()
+
+    def sample_mid():
+        while not done.wait(args.mem_interval):
+            with profiler.lock:
+                if profiler.snapshots and profiler.snapshots[-1][0] == "mid":
+                    profiler.snapshots.pop()
+            profiler.snapshot("mid")
+
+    sys.argv = [str(script), *args.args]
+    sys.path.insert(0, str(script.resolve().parent))
+    profiler.start()
+    profiler.snapshot("start")
+    if args.profile == "mem" and args.mem_interval > 0:
+        threading.Thread(target=sample_mid, name="profile-mid", daemon=True).start()
+    try:
+        runpy.run_path(str(script), run_name="__main__")
+    finally:
+        done.set()
+        profiler.snapshot("end")
+        profiler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+import math
+import time
+
+
+DEFAULT_ALPHA = 0.2
+# Two-sided 90% normal interval.
+DEFAULT_Z = 1.645
+
+
+class ProgressTracker:
+    """Done/total counters and an exponentially weighted chars/sec estimate for one run.
+
+    Every update is O(1): the engine seeds the counters once (e.g. from a resumed
+    checkpoint) and then calls record() per finished batch. The rate is an EWMA of
+    per-batch chars/sec, so it follows the current backend speed instead of the
+    whole-run mean, and items resumed from a checkpoint do not inflate it.
+    eta() bounds come from the EWMA variance: the interval widens while batch times
+    are erratic and tightens as they settle."""
+
+    def __init__(self, total_items, total_chars, done_items=0, done_chars=0, alpha=DEFAULT_ALPHA, z=DEFAULT_Z):
+        self.total_items = total_items
+        self.total_chars = total_chars
+        self.done_items = done_items
+        self.done_chars = done_chars
+        self.alpha = alpha
+        self.z = z
+        self.batches = 0
+        self.rate = None  # chars/sec
+        self.var = 0.0
+        self.started = time.time()
+        self.last = time.monotonic()
+
+    @property
+    def remaining_items(self):
+        return max(self.total_items - self.done_items, 0)
+
+    @property
+    def remaining_chars(self):
+        return max(self.total_chars - self.done_chars, 0)
+
+    @property
+    def pct(self):
+        return self.done_items / self.total_items * 100.0 if self.total_items else 100.0
+
+    def record(self, items, chars, seconds=None):
+        """Count a finished batch. seconds defaults to the wall time since the previous
+        record() (or construction), so checkpoints and queueing count against the rate."""
+        now = time.monotonic()
+        if seconds is None:
+            seconds = now - self.last
+        self.last = now
+        self.done_items += items
+        self.done_chars += chars
+        self.observe(chars, seconds)
+
+    def observe(self, chars, seconds):
+        """Feed one batch into the rate estimate without touching the counters
+        (used to replay a finished run's log)."""
+        self.batches += 1
+        if seconds <= 0 or chars <= 0:
+            return
+        sample = chars / seconds
+        if self.rate is None:
+            # One sample says nothing about spread; start at +-50% and let later batches narrow it.
+            self.rate = sample
+            self.var = (sample / 2) ** 2
+            return
+        # West's incremental EW mean/variance.
+        diff = sample - self.rate
+        incr = self.alpha * diff
+        self.rate += incr
+        self.var = (1 - self.alpha) * (self.var + diff * incr)
+
+    def skip(self):
+        """Restart the interval clock without counting a batch (e.g. after a long pause)."""
+        self.last = time.monotonic()
+
+    def eta(self):
+        """(low, expected, high) seconds to finish, or None before the first timed batch."""
+        if not self.rate:
+            return None
+        remaining = self.remaining_chars
+        if remaining == 0:
+            return 0.0, 0.0, 0.0
+        # Standard error of the EWMA itself: sigma * sqrt(alpha / (2 - alpha)).
+        spread = self.z * math.sqrt(self.var * self.alpha / (2 - self.alpha))
+        fast = self.rate + spread
+        slow = self.rate - spread
+        expected = remaining / self.rate
+        low = remaining / fast
+        high = remaining / slow if slow > 0 else math.inf
+        return low, expected, high
+
+    def snapshot(self):
+        eta = self.eta()
+        return {
+            "done_items": self.done_items,
+            "total_items": self.total_items,
+            "done_chars": self.done_chars,
+            "total_chars": self.total_chars,
+            "batches": self.batches,
+            "chars_per_sec": round(self.rate, 3) if self.rate else None,
+            "eta_s": None if eta is None else [round(x) if math.isfinite(x) else None for x in eta],
+        }
+
+
+def format_seconds(sec):
+    """MM:SS, or HH:MM:SS from an hour up (the translators' progress lines)."""
+    sec = int(max(sec, 0))
+    h = sec // 3600
+    m = (sec % 3600) // 60
+    s = sec % 60
+    if h > 0:
+        return f"{h:02d}:{m:02d}:{s:02d}"
+    return f"{m:02d}:{s:02d}"
+
+
+def format_eta(eta, fmt):
+    """'expected (low-high)' with fmt(seconds) -> str; '-' while unknown."""
+    if eta is None:
+        return "-"
+    low, expected, high = eta
+    high_text = fmt(high) if math.isfinite(high) else "?"
+    return f"{fmt(expected)} ({fmt(low)}-{high_text})"
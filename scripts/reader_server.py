@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+import argparse
+import email.utils
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from build_corpus_db import DB_PATH, connect, search
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+HASHED_RE = re.compile(r"^data/derived/dist/.+\.[0-9a-f]{12}\.[a-z]+$")
+SENDFILE_CHUNK = 1 << 20
+
+
+def accepts_gzip(header: str) -> bool:
+    for part in (header or "").split(","):
+        fields = [x.strip() for x in part.split(";")]
+        coding = fields[0].lower()
+        if coding not in ("gzip", "*"):
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            if param.lower().startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            return True
+    return False
+
+
+def etag_for(st, encoding: str) -> str:
+    suffix = f"-{encoding}" if encoding else ""
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}{suffix}"'
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2) for If-None-Match.
+    header = (header or "").strip()
+    if header == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+def parse_range(header: str, size: int):
+    # Single byte range only; anything else is served as a full 200 response.
+    m = RANGE_RE.match((header or "").strip())
+    if not m:
+        return None
+    first, last = m.group(1), m.group(2)
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return "unsatisfiable"
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
+
+
+class ReaderRequestHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "PaliReader/1.0"
+    extensions_map = {
+        **SimpleHTTPRequestHandler.extensions_map,
+        ".json": "application/json",
+        ".xml": "application/xml",
+        ".js": "text/javascript",
+    }
+
+    def cache_control_for(self, rel_path: str) -> str:
+        # Content-hashed copies from build_precompressed.py never change under the same name.
+        if HASHED_RE.match(rel_path):
+            return "public, max-age=31536000, immutable"
+        return "no-cache"
+
+    def do_GET(self):
+        if urlsplit(self.path).path == "/api/search":
+            self.serve_search()
+            return
+        self.serve(head_only=False)
+
+    def do_HEAD(self):
+        self.serve(head_only=True)
+
+    def serve(self, head_only: bool):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].endswith("/"):
+                # Let SimpleHTTPRequestHandler send the trailing-slash redirect.
+                return self.serve_fallback(head_only)
+            index = os.path.join(path, "index.html")
+            if not os.path.isfile(index):
+                return self.serve_fallback(head_only)
+            path = index
+        if not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        encoding = ""
+        body_path = path
+        gz_path = path + ".gz"
+        if (
+            not path.endswith(".gz")
+            and accepts_gzip(self.headers.get("Accept-Encoding"))
+            and os.path.isfile(gz_path)
+            and os.stat(gz_path).st_mtime_ns >= os.stat(path).st_mtime_ns
+        ):
+            encoding = "gzip"
+            body_path = gz_path
+
+        try:
+            f = open(body_path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            etag = etag_for(st, encoding)
+            last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+            rel_path = os.path.relpath(path, self.directory).replace(os.sep, "/")
+
+            if self.not_modified(etag, st):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_common_headers(etag, last_modified, rel_path)
+                self.end_headers()
+                return
+
+            size = st.st_size
+            start, end = 0, size - 1
+            status = HTTPStatus.OK
+            byte_range = None
+            if self.headers.get("Range") and self.range_allowed(etag, st):
+                byte_range = parse_range(self.headers["Range"], size)
+            if byte_range == "unsatisfiable":
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.send_common_headers(etag, last_modified, rel_path)
+                self.end_headers()
+                return
+            if byte_range:
+                start, end = byte_range
+                status = HTTPStatus.PARTIAL_CONTENT
+
+            length = max(end - start + 1, 0)
+            self.send_response(status)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Length", str(length))
+            if status == HTTPStatus.PARTIAL_CONTENT:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_common_headers(etag, last_modified, rel_path)
+            self.end_headers()
+            if not head_only and length:
+                self.copy_range(f, start, length)
+
+    def send_common_headers(self, etag, last_modified, rel_path):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Cache-Control", self.cache_control_for(rel_path))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Vary", "Accept-Encoding")
+
+    def not_modified(self, etag, st) -> bool:
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            return etag_matches(inm, etag)
+        ims = self.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                since = email.utils.parsedate_to_datetime(ims).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            return int(st.st_mtime) <= since
+        return False
+
+    def range_allowed(self, etag, st) -> bool:
+        if_range = self.headers.get("If-Range")
+        if not if_range:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            # If-Range requires a strong match.
+            return if_range == etag
+        try:
+            return int(st.st_mtime) <= email.utils.parsedate_to_datetime(if_range).timestamp()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+
+    def copy_range(self, f, start, length):
+        self.wfile.flush()
+        offset = start
+        remaining = length
+        try:
+            sock_fd = self.connection.fileno()
+            while remaining > 0:
+                sent = os.sendfile(sock_fd, f.fileno(), offset, min(remaining, SENDFILE_CHUNK))
+                if sent == 0:
+                    break
+                offset += sent
+                remaining -= sent
+            return
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        except (AttributeError, OSError):
+            # No sendfile on this platform/socket: plain buffered copy from where it stopped.
+            pass
+        f.seek(offset)
+        while remaining > 0:
+            chunk = f.read(min(remaining, 64 * 1024))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
+
+    def send_json(self, status, obj):
+        body = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def serve_search(self):
+        # GET /api/search?q=...&lang=romn|ko&page=1&size=20[&file=...][&trans=1]
+        conn = self.server.corpus_db()
+        if conn is None:
+            self.send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "corpus db not built (scripts/build_corpus_db.py)"})
+            return
+        qs = parse_qs(urlsplit(self.path).query)
+
+        def arg(name, default=""):
+            return qs.get(name, [default])[0]
+
+        try:
+            result = search(
+                conn,
+                arg("q"),
+                lang=arg("lang", "romn"),
+                page=int(arg("page", "1")),
+                size=int(arg("size", "20")),
+                file=arg("file") or None,
+                translated_only=arg("trans") == "1",
+            )
+        except ValueError:
+            self.send_json(HTTPStatus.BAD_REQUEST, {"error": "page and size must be integers"})
+            return
+        except sqlite3.Error as exc:
+            self.send_json(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+            return
+        self.send_json(HTTPStatus.OK, result)
+
+    def serve_fallback(self, head_only: bool):
+        f = self.send_head()
+        if f:
+            try:
+                if not head_only:
+                    shutil.copyfileobj(f, self.wfile)
+            finally:
+                f.close()
+
+
+class ReaderServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+    db_path = None
+    _local = threading.local()
+
+    def corpus_db(self):
+        # One read-only connection per handler thread.
+        if not self.db_path or not os.path.isfile(self.db_path):
+            return None
+        if getattr(self._local, "conn", None) is None:
+            self._local.conn = connect(Path(self.db_path), readonly=True)
+        return self._local.conn
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Static server for the reader: keep-alive, ETag/304, precompressed .gz, byte ranges, sendfile."
+    )
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--directory", default=str(ROOT_DIR), help="Document root (default: repo root)")
+    parser.add_argument(
+        "--db",
+        default=str(DB_PATH),
+        help="SQLite corpus DB for /api/search (scripts/build_corpus_db.py); the endpoint answers 503 if missing",
+    )
+    args = parser.parse_args()
+
+    directory = str(Path(args.directory).resolve())
+
+    def handler(*a, **kw):
+        return ReaderRequestHandler(*a, directory=directory, **kw)
+
+    with ReaderServer((args.bind, args.port), handler) as httpd:
+        httpd.db_path = args.db
+        print(f"Serving {directory} on http://{args.bind}:{args.port}/", flush=True)
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
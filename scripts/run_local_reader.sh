@@ -71,7 +71,7 @@ start_server() {
   else
     rm -f "${PID_FILE}"
     cd "${ROOT_DIR}"
-    nohup python3 -m http.server "${PORT}" --bind "${HOST}" > "${LOG_FILE}" 2>&1 &
+    nohup python3 "${SCRIPT_DIR}/reader_server.py" --port "${PORT}" --bind "${HOST}" --directory "${ROOT_DIR}" > "${LOG_FILE}" 2>&1 &
     echo $! > "${PID_FILE}"
     pid="$(cat "${PID_FILE}")"
     echo "Starting server (pid=${pid})"
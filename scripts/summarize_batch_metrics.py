@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+import argparse
+import glob
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+
+# Upper bounds (seconds) of the batch latency histogram buckets; the last bucket is open.
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+# Upper bounds (chars/sec) of the per-batch throughput histogram buckets.
+RATE_BUCKETS = (5, 10, 20, 50, 100, 200, 500, 1000)
+BAR_WIDTH = 30
+
+
+def read_records(patterns):
+    records = []
+    for pattern in patterns:
+        paths = sorted(glob.glob(pattern)) or [pattern]
+        for path in paths:
+            with Path(path).open(encoding="utf-8") as f:
+                for line_no, line in enumerate(f, start=1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        print(f"skip {path}:{line_no}: not JSON", file=sys.stderr)
+    return records
+
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    idx = min(int(round(q * (len(sorted_vals) - 1))), len(sorted_vals) - 1)
+    return sorted_vals[idx]
+
+
+def histogram(values, bounds):
+    counts = [0] * (len(bounds) + 1)
+    for v in values:
+        for i, b in enumerate(bounds):
+            if v <= b:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={b}" for b in bounds] + [f">{bounds[-1]}"]
+    return list(zip(labels, counts))
+
+
+def summarize(records):
+    batch_s = sorted(r["batch_s"] for r in records)
+    wall = sum(batch_s)
+    items = sum(r["items"] for r in records)
+    chars = sum(r["chars"] for r in records)
+    rates = [r["chars"] / r["batch_s"] for r in records if r["batch_s"] > 0]
+    return {
+        "batches": len(records),
+        "items": items,
+        "chars": chars,
+        "seconds": round(wall, 2),
+        "items_per_sec": round(items / wall, 3) if wall else None,
+        "chars_per_sec": round(chars / wall, 2) if wall else None,
+        "latency_s": {q: round(percentile(batch_s, p), 2) for q, p in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))},
+        "latency_max_s": round(batch_s[-1], 2) if batch_s else 0.0,
+        "share": {
+            k: round(sum(r.get(f"{k}_s", 0.0) for r in records) / wall, 4) if wall else 0.0
+            for k in ("queue_wait", "spawn", "backend", "parse", "checkpoint")
+        },
+        "retries": sum(r.get("retries", 0) for r in records),
+        "mismatches": sum(r.get("mismatches", 0) for r in records),
+        "max_split_depth": max((r.get("split_depth", 0) for r in records), default=0),
+        "latency_hist": histogram(batch_s, LATENCY_BUCKETS),
+        "rate_hist": histogram(rates, RATE_BUCKETS),
+    }
+
+
+def print_hist(title, hist):
+    peak = max((c for _, c in hist), default=0)
+    print(f"  {title}")
+    for label, count in hist:
+        if not count:
+            continue
+        bar = "#" * max(1, round(count / peak * BAR_WIDTH)) if peak else ""
+        print(f"    {label:>8} {count:>6} {bar}")
+
+
+def print_group(key, s):
+    print(f"\n== {key}")
+    print(
+        f"  batches={s['batches']} items={s['items']} chars={s['chars']} time={s['seconds']}s | "
+        f"{s['items_per_sec']} items/s, {s['chars_per_sec']} chars/s"
+    )
+    lat = s["latency_s"]
+    print(f"  batch latency p50={lat['p50']}s p90={lat['p90']}s p99={lat['p99']}s max={s['latency_max_s']}s")
+    print("  time share: " + ", ".join(f"{k}={v:.1%}" for k, v in s["share"].items()))
+    print(f"  retries={s['retries']} mismatches={s['mismatches']} max_split_depth={s['max_split_depth']}")
+    print_hist("batch seconds", s["latency_hist"])
+    print_hist("chars/sec per batch", s["rate_hist"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarize per-batch translation metrics (*.metrics.jsonl): throughput and latency histograms per file and per model."
+    )
+    parser.add_argument("paths", nargs="+", help="Metrics JSONL files or glob patterns")
+    parser.add_argument("--by", choices=("file", "model", "both"), default="both", help="Grouping")
+    parser.add_argument("--slowest", type=int, default=5, help="List the N slowest batches")
+    parser.add_argument("--json", default="", help="Also write the summary as JSON")
+    args = parser.parse_args()
+
+    records = [r for r in read_records(args.paths) if "batch_s" in r]
+    if not records:
+        raise RuntimeError("no batch records found")
+
+    groups = {}
+    for dim in ("file", "model"):
+        if args.by not in (dim, "both"):
+            continue
+        by_key = defaultdict(list)
+        for r in records:
+            by_key[r.get(dim) or "(default)"].append(r)
+        groups[dim] = {k: summarize(v) for k, v in sorted(by_key.items())}
+
+    overall = summarize(records)
+    print_group("all", overall)
+    for dim, by_key in groups.items():
+        for key, s in by_key.items():
+            print_group(f"{dim}: {key}", s)
+
+    if args.slowest:
+        print(f"\nslowest {args.slowest} batches:")
+        for r in sorted(records, key=lambda x: -x["batch_s"])[: args.slowest]:
+            print(
+                f"  {r.get('file')} batch {r.get('batch')}/{r.get('batches')} {r['batch_s']:.1f}s "
+                f"items={r['items']} chars={r['chars']} backend={r.get('backend_s', 0):.1f}s "
+                f"retries={r.get('retries', 0)} split_depth={r.get('split_depth', 0)} ({r.get('ts', '')})"
+            )
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps({"v": 1, "all": overall, "groups": groups}, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8",
+        )
+        print(f"written: {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class Tracer:
+    """Records nested spans as Chrome trace events ("X" complete events, microseconds).
+
+    Open the saved file in chrome://tracing or https://ui.perfetto.dev. With no path every
+    call is a no-op, so engines can always pass a tracer around."""
+
+    def __init__(self, path=None, process_name=""):
+        self.path = Path(path) if path else None
+        self.pid = os.getpid()
+        self.started = time.perf_counter()
+        self.events = []
+        self.threads = {}
+        self.lock = threading.Lock()
+        if self.path and process_name:
+            self.events.append({"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": process_name}})
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def _now_us(self):
+        return (time.perf_counter() - self.started) * 1e6
+
+    def _tid(self):
+        thread = threading.current_thread()
+        tid = thread.ident or 0
+        if tid not in self.threads:
+            self.threads[tid] = thread.name
+        return tid
+
+    @contextmanager
+    def span(self, name, **args):
+        if self.path is None:
+            yield
+            return
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            event = {"name": name, "ph": "X", "ts": round(start, 1), "dur": round(self._now_us() - start, 1), "pid": self.pid, "tid": self._tid()}
+            if args:
+                event["args"] = args
+            with self.lock:
+                self.events.append(event)
+
+    def instant(self, name, **args):
+        if self.path is None:
+            return
+        event = {"name": name, "ph": "i", "s": "t", "ts": round(self._now_us(), 1), "pid": self.pid, "tid": self._tid()}
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+
+    def save(self):
+        if self.path is None:
+            return
+        with self.lock:
+            meta = [
+                {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self.threads.items()
+            ]
+            events = meta + self.events
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+# Shared disabled tracer for default arguments.
+NO_TRACE = Tracer()
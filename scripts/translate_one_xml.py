@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import atexit
 import json
 import os
 import re
@@ -8,6 +9,10 @@ from pathlib import Path
 from xml.dom import minidom
 from urllib import request
 
+from profiling import RunProfiler, add_profile_args
+from progress_tracker import ProgressTracker, format_eta, format_seconds
+from trace_events import NO_TRACE, Tracer
+
 
 SYSTEM_PROMPT = (
     "당신은 신심있는 테라와다 불자로서, 한국어와 Pali에 능통한 번역가이다. "
@@ -53,44 +58,47 @@ def collect_text_nodes(node, bag):
             collect_text_nodes(child, bag)
 
 
-def call_openai_batch(texts, model):
+def call_openai_batch(texts, model, tracer=NO_TRACE):
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY is not set.")
 
-    payload = {
-        "model": model,
-        "input": [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {
-                "role": "user",
-                "content": (
-                    "아래 JSON 배열의 각 문자열을 같은 순서로 한국어로 번역해라. "
-                    "반드시 JSON 배열(string[])만 출력해라.\n\n"
-                    f"{json.dumps(texts, ensure_ascii=False)}"
-                ),
+    with tracer.span("build prompt"):
+        payload = {
+            "model": model,
+            "input": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {
+                    "role": "user",
+                    "content": (
+                        "아래 JSON 배열의 각 문자열을 같은 순서로 한국어로 번역해라. "
+                        "반드시 JSON 배열(string[])만 출력해라.\n\n"
+                        f"{json.dumps(texts, ensure_ascii=False)}"
+                    ),
+                },
+            ],
+        }
+        req = request.Request(
+            "https://api.openai.com/v1/responses",
+            data=json.dumps(payload).encode("utf-8"),
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
             },
-        ],
-    }
-    req = request.Request(
-        "https://api.openai.com/v1/responses",
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
-        method="POST",
-    )
-    with request.urlopen(req, timeout=180) as resp:
-        body = resp.read().decode("utf-8")
-    data = json.loads(body)
-    output_text = data.get("output_text", "").strip()
-    if not output_text:
-        raise RuntimeError("No output_text in API response.")
-    try:
-        arr = json.loads(output_text)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError(f"Model did not return JSON array: {output_text[:500]}") from exc
+            method="POST",
+        )
+    with tracer.span("wait"):
+        with request.urlopen(req, timeout=180) as resp:
+            body = resp.read().decode("utf-8")
+    with tracer.span("JSON parse"):
+        data = json.loads(body)
+        output_text = data.get("output_text", "").strip()
+        if not output_text:
+            raise RuntimeError("No output_text in API response.")
+        try:
+            arr = json.loads(output_text)
+        except json.JSONDecodeError as exc:
+            raise RuntimeError(f"Model did not return JSON array: {output_text[:500]}") from exc
     if not isinstance(arr, list) or len(arr) != len(texts):
         raise RuntimeError("Translated array length mismatch.")
     return [str(x) for x in arr]
@@ -102,31 +110,50 @@ def main():
     parser.add_argument("--output", required=True, help="Output XML path")
     parser.add_argument("--model", default="gpt-4.1-mini")
     parser.add_argument("--batch-size", type=int, default=80)
+    parser.add_argument("--trace", default=None, help="Write Chrome trace-event spans to this JSON file")
+    add_profile_args(parser)
     args = parser.parse_args()
 
     in_path = Path(args.input)
     out_path = Path(args.output)
-    raw = in_path.read_bytes()
-    xml_text, enc = decode_xml_bytes(raw)
-    dom = minidom.parseString(xml_text)
-
-    nodes = []
-    collect_text_nodes(dom, nodes)
-    originals = [n.data for n in nodes]
+    tracer = Tracer(args.trace, process_name=f"translate {in_path.name}")
+    atexit.register(tracer.save)
+    profiler = RunProfiler(args.profile, args.profile_out or str(out_path) + ".profile", args.profile_top)
+    profiler.start()
+    atexit.register(profiler.stop)
+    with tracer.span("plan"):
+        raw = in_path.read_bytes()
+        xml_text, enc = decode_xml_bytes(raw)
+        dom = minidom.parseString(xml_text)
+
+        nodes = []
+        collect_text_nodes(dom, nodes)
+        originals = [n.data for n in nodes]
+    profiler.snapshot("plan")
     print(f"collected text nodes: {len(originals)}")
 
     translated = []
-    for i in range(0, len(originals), args.batch_size):
+    progress = ProgressTracker(len(originals), sum(len(x) for x in originals))
+    starts = range(0, len(originals), args.batch_size)
+    for i in starts:
         chunk = originals[i : i + args.batch_size]
         print(f"translating chunk {i}..{i + len(chunk) - 1}")
-        translated.extend(call_openai_batch(chunk, args.model))
-
-    for node, text in zip(nodes, translated):
-        node.data = text
-
-    rendered = dom.toxml()
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_bytes(encode_xml_text(rendered, enc))
+        with tracer.span("backend", start=i, items=len(chunk)):
+            translated.extend(call_openai_batch(chunk, args.model, tracer=tracer))
+        progress.record(len(chunk), sum(len(x) for x in chunk))
+        print(f"  -> {progress.done_items}/{progress.total_items} ({progress.pct:5.1f}%) | eta={format_eta(progress.eta(), format_seconds)}")
+        if i == starts[(len(starts) - 1) // 2]:
+            profiler.snapshot("mid")
+
+    with tracer.span("apply to DOM"):
+        for node, text in zip(nodes, translated):
+            node.data = text
+
+    with tracer.span("write"):
+        rendered = dom.toxml()
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_bytes(encode_xml_text(rendered, enc))
+    profiler.snapshot("end")
     print(f"written: {out_path}")
 
 
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import atexit
 import json
 import os
 import re
@@ -7,10 +8,17 @@ import subprocess
 import sys
 import tempfile
 import time
+from contextlib import ExitStack
 from datetime import datetime
 from pathlib import Path
 from xml.dom import minidom
 
+from log_sink import DEFAULT_BACKUPS, DEFAULT_MAX_BYTES, LogSink, close_all
+from metrics_server import DEFAULT_METRICS_LINGER, TranslationMetrics, serve_metrics
+from progress_tracker import ProgressTracker, format_eta, format_seconds
+from profiling import RunProfiler, add_profile_args
+from trace_events import NO_TRACE, Tracer
+
 
 SYSTEM_PROMPT = (
     "당신은 신심있는 테라와다 불자로서, 한국어와 Pali에 능통한 번역가이다. "
@@ -54,71 +62,104 @@ def collect_text_nodes(node, bag):
             collect_text_nodes(child, bag)
 
 
-def run_codex_translate_batch(texts, model=None, depth=0):
+def new_batch_stats():
+    # Filled in by run_codex_translate_batch across its split retries; one per batch.
+    return {
+        "calls": 0,
+        "split_depth": 0,
+        "mismatches": 0,
+        "spawn_s": 0.0,
+        "backend_s": 0.0,
+        "parse_s": 0.0,
+    }
+
+
+def run_codex_translate_batch(texts, model=None, depth=0, stats=None, tracer=NO_TRACE, log=print):
     if not texts:
         return []
+    if stats is None:
+        stats = new_batch_stats()
+    stats["calls"] += 1
+    stats["split_depth"] = max(stats["split_depth"], depth)
     if depth > 5:
         raise RuntimeError(f"Exceeded retry depth while translating batch of {len(texts)}")
-    with tempfile.TemporaryDirectory() as td:
-        td_path = Path(td)
-        schema_path = td_path / "schema.json"
-        out_path = td_path / "out.json"
-
-        schema = {
-            "type": "object",
-            "properties": {
-                "translations": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                }
-            },
-            "required": ["translations"],
-            "additionalProperties": False,
-        }
-        schema_path.write_text(json.dumps(schema), encoding="utf-8")
-
-        user_prompt = (
-            f"{SYSTEM_PROMPT}\n\n"
-            "다음 JSON 배열의 각 원소(빠알리/로마자 텍스트)를 같은 순서로 한국어로 번역하라.\n"
-            "반드시 JSON 객체 하나만 출력하고, 형식은 {\"translations\": string[]} 이어야 한다.\n"
-            "설명/코드블록/마크다운을 넣지 마라.\n\n"
-            f"{json.dumps(texts, ensure_ascii=False)}"
-        )
-
-        cmd = [
-            "codex",
-            "exec",
-            "--skip-git-repo-check",
-            "--sandbox",
-            "workspace-write",
-            "--output-schema",
-            str(schema_path),
-            "--output-last-message",
-            str(out_path),
-        ]
-        if model:
-            cmd.extend(["-m", model])
-        cmd.append("-")
-
-        proc = subprocess.run(
-            cmd,
-            input=user_prompt,
-            text=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=False,
-        )
+    with tracer.span("codex call", items=len(texts), depth=depth), ExitStack() as stack:
+        with tracer.span("tempdir/schema write"):
+            td_path = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+            schema_path = td_path / "schema.json"
+            out_path = td_path / "out.json"
+
+            schema = {
+                "type": "object",
+                "properties": {
+                    "translations": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                    }
+                },
+                "required": ["translations"],
+                "additionalProperties": False,
+            }
+            schema_path.write_text(json.dumps(schema), encoding="utf-8")
+
+        with tracer.span("build prompt"):
+            user_prompt = (
+                f"{SYSTEM_PROMPT}\n\n"
+                "다음 JSON 배열의 각 원소(빠알리/로마자 텍스트)를 같은 순서로 한국어로 번역하라.\n"
+                "반드시 JSON 객체 하나만 출력하고, 형식은 {\"translations\": string[]} 이어야 한다.\n"
+                "설명/코드블록/마크다운을 넣지 마라.\n\n"
+                f"{json.dumps(texts, ensure_ascii=False)}"
+            )
+
+            cmd = [
+                "codex",
+                "exec",
+                "--skip-git-repo-check",
+                "--sandbox",
+                "workspace-write",
+                "--output-schema",
+                str(schema_path),
+                "--output-last-message",
+                str(out_path),
+            ]
+            if model:
+                cmd.extend(["-m", model])
+            cmd.append("-")
+
+        spawn_started = time.perf_counter()
+        with tracer.span("subprocess spawn"):
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        wait_started = time.perf_counter()
+        with tracer.span("wait"):
+            try:
+                stdout, stderr = proc.communicate(user_prompt)
+            except BaseException:
+                # Same cleanup as subprocess.run: never leave codex running or unreaped (Ctrl-C included).
+                proc.kill()
+                proc.wait()
+                raise
+        stats["spawn_s"] += wait_started - spawn_started
+        stats["backend_s"] += time.perf_counter() - wait_started
         if proc.returncode != 0:
             raise RuntimeError(
                 f"codex exec failed (exit={proc.returncode})\n"
-                f"STDOUT:\n{proc.stdout[-2000:]}\nSTDERR:\n{proc.stderr[-2000:]}"
+                f"STDOUT:\n{stdout[-2000:]}\nSTDERR:\n{stderr[-2000:]}"
             )
 
         if not out_path.exists():
             raise RuntimeError("codex output file missing.")
 
-        raw = out_path.read_text(encoding="utf-8").strip()
-        parsed = json.loads(raw)
+        parse_started = time.perf_counter()
+        with tracer.span("JSON parse"):
+            raw = out_path.read_text(encoding="utf-8").strip()
+            parsed = json.loads(raw)
+        stats["parse_s"] += time.perf_counter() - parse_started
         arr = parsed.get("translations") if isinstance(parsed, dict) else None
         if not isinstance(arr, list):
             raise RuntimeError("codex output is not {translations: string[]}.")
@@ -126,12 +167,14 @@ def run_codex_translate_batch(texts, model=None, depth=0):
             if len(texts) == 1:
                 raise RuntimeError(f"Length mismatch: expected 1, got {len(arr)}")
             mid = len(texts) // 2
-            print(
+            stats["mismatches"] += 1
+            tracer.instant("length mismatch", got=len(arr), expected=len(texts))
+            log(
                 f"  ! length mismatch ({len(arr)}/{len(texts)}), "
                 f"retry split batch: {mid} + {len(texts)-mid}"
             )
-            left = run_codex_translate_batch(texts[:mid], model=model, depth=depth + 1)
-            right = run_codex_translate_batch(texts[mid:], model=model, depth=depth + 1)
+            left = run_codex_translate_batch(texts[:mid], model=model, depth=depth + 1, stats=stats, tracer=tracer, log=log)
+            right = run_codex_translate_batch(texts[mid:], model=model, depth=depth + 1, stats=stats, tracer=tracer, log=log)
             return left + right
         return [str(x) for x in arr]
 
@@ -227,15 +270,25 @@ def now_iso():
 
 
 class Logger:
-    def __init__(self, log_path: Path):
+    # Timestamped here, written and echoed to stdout by the sink's background thread.
+    def __init__(self, log_path: Path, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
         self.log_path = log_path
-        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.sink = LogSink(log_path, echo=True, max_bytes=max_bytes, backups=backups)
 
     def log(self, msg: str):
-        line = f"[{now_iso()}] {msg}"
-        print(line, flush=True)
-        with self.log_path.open("a", encoding="utf-8") as f:
-            f.write(line + "\n")
+        self.sink.write(f"[{now_iso()}] {msg}")
+
+
+class BatchMetrics:
+    """One JSON object per finished batch (summarize with scripts/summarize_batch_metrics.py)."""
+
+    def __init__(self, metrics_path: Path):
+        self.metrics_path = metrics_path
+        # Never rotated: the summarizer and forecaster read the whole file.
+        self.sink = LogSink(metrics_path)
+
+    def write(self, record: dict):
+        self.sink.write(json.dumps(record, ensure_ascii=False))
 
 
 def atomic_write_text(path: Path, text: str):
@@ -269,28 +322,47 @@ def write_partial_output(
     translated_by_item,
     output_path: Path,
     enc: str,
+    tracer=NO_TRACE,
 ):
-    for node_idx, node in enumerate(nodes):
-        item_ids = node_item_ids.get(node_idx, [])
-        if not item_ids:
-            node.data = originals[node_idx]
-            continue
-        translated_pieces = []
-        all_done = True
-        for item_id in item_ids:
-            t = translated_by_item[item_id]
-            if t is None:
-                all_done = False
-                break
-            translated_pieces.append(str(t).strip())
-        if all_done:
-            node.data = " ".join(x for x in translated_pieces if x).strip()
-        else:
-            node.data = originals[node_idx]
+    with tracer.span("apply to DOM"):
+        for node_idx, node in enumerate(nodes):
+            item_ids = node_item_ids.get(node_idx, [])
+            if not item_ids:
+                node.data = originals[node_idx]
+                continue
+            translated_pieces = []
+            all_done = True
+            for item_id in item_ids:
+                t = translated_by_item[item_id]
+                if t is None:
+                    all_done = False
+                    break
+                translated_pieces.append(str(t).strip())
+            if all_done:
+                node.data = " ".join(x for x in translated_pieces if x).strip()
+            else:
+                node.data = originals[node_idx]
 
-    out_file = output_path.with_suffix(output_path.suffix + ".partial")
-    out_file.parent.mkdir(parents=True, exist_ok=True)
-    out_file.write_bytes(encode_xml_text(dom.toxml(), enc))
+    with tracer.span("partial write"):
+        out_file = output_path.with_suffix(output_path.suffix + ".partial")
+        out_file.parent.mkdir(parents=True, exist_ok=True)
+        out_file.write_bytes(encode_xml_text(dom.toxml(), enc))
+
+
+def write_final_output(dom, nodes, node_item_ids, translated_by_item, output_path: Path, enc: str, tracer=NO_TRACE):
+    with tracer.span("apply to DOM"):
+        for node_idx, node in enumerate(nodes):
+            item_ids = node_item_ids.get(node_idx, [])
+            if not item_ids:
+                continue
+            merged = " ".join((translated_by_item[item_id] or "").strip() for item_id in item_ids).strip()
+            if merged:
+                node.data = merged
+
+    with tracer.span("write"):
+        rendered = dom.toxml()
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_bytes(encode_xml_text(rendered, enc))
 
 
 def main():
@@ -306,31 +378,54 @@ def main():
     )
     parser.add_argument("--state-file", default=None, help="Checkpoint state JSON path")
     parser.add_argument("--log-file", default=None, help="Progress log file path")
+    parser.add_argument("--log-max-bytes", type=int, default=DEFAULT_MAX_BYTES, help="Rotate the progress log past this size (0 = never)")
+    parser.add_argument("--log-backups", type=int, default=DEFAULT_BACKUPS, help="Rotated progress logs to keep")
+    parser.add_argument("--metrics-file", default=None, help="Per-batch metrics JSONL path")
+    parser.add_argument("--trace", default=None, help="Write Chrome trace-event spans to this JSON file")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Serve Prometheus metrics on this port (0 = off)")
+    parser.add_argument("--metrics-bind", default="127.0.0.1", help="Bind address for --metrics-port")
+    parser.add_argument(
+        "--metrics-linger",
+        type=float,
+        default=DEFAULT_METRICS_LINGER,
+        help="Keep serving --metrics-port this many seconds after a failed batch, so the last scrape sees the error",
+    )
     parser.add_argument("--no-resume", action="store_true", help="Ignore existing checkpoint and start from scratch")
+    add_profile_args(parser)
     args = parser.parse_args()
 
     in_path = Path(args.input)
     out_path = Path(args.output)
     state_path = Path(args.state_file) if args.state_file else Path(str(out_path) + ".state.json")
     log_path = Path(args.log_file) if args.log_file else Path(str(out_path) + ".progress.log")
-    logger = Logger(log_path)
-
-    raw = in_path.read_bytes()
-    xml_text, enc = decode_xml_bytes(raw)
-    dom = minidom.parseString(xml_text)
-
-    nodes = []
-    collect_text_nodes(dom, nodes)
-    originals = [n.data for n in nodes]
-    total_nodes = len(originals)
-    logger.log(f"collected text nodes: {total_nodes}")
-
-    items = build_translation_items(originals, args.max_batch_chars)
-    for item_id, item in enumerate(items):
-        item["item_id"] = item_id
-    batches = build_batches(items, args.max_batch_chars)
-    node_item_ids = build_node_item_ids(items, total_nodes)
-    total_items = len(items)
+    metrics_path = Path(args.metrics_file) if args.metrics_file else Path(str(out_path) + ".metrics.jsonl")
+    logger = Logger(log_path, args.log_max_bytes, args.log_backups)
+    metrics = BatchMetrics(metrics_path)
+    tracer = Tracer(args.trace, process_name=f"translate {in_path.name}")
+    # Saved on normal exit, on errors and after Ctrl-C alike.
+    atexit.register(tracer.save)
+    profiler = RunProfiler(args.profile, args.profile_out or str(out_path) + ".profile", args.profile_top)
+    profiler.start()
+    atexit.register(profiler.stop)
+
+    with tracer.span("plan"):
+        raw = in_path.read_bytes()
+        xml_text, enc = decode_xml_bytes(raw)
+        dom = minidom.parseString(xml_text)
+
+        nodes = []
+        collect_text_nodes(dom, nodes)
+        originals = [n.data for n in nodes]
+        total_nodes = len(originals)
+        logger.log(f"collected text nodes: {total_nodes}")
+
+        items = build_translation_items(originals, args.max_batch_chars)
+        for item_id, item in enumerate(items):
+            item["item_id"] = item_id
+        batches = build_batches(items, args.max_batch_chars)
+        node_item_ids = build_node_item_ids(items, total_nodes)
+        total_items = len(items)
+    profiler.snapshot("plan")
     logger.log(
         f"planned translation items: {total_items} "
         f"(paragraph splits included), batches: {len(batches)}, "
@@ -349,6 +444,7 @@ def main():
         "total_items": total_items,
     }
 
+    resumed = False
     if not args.no_resume:
         prev = load_state(state_path)
         if prev:
@@ -356,90 +452,130 @@ def main():
             prev_arr = prev.get("translated_by_item")
             if prev_sig == run_sig and isinstance(prev_arr, list) and len(prev_arr) == total_items:
                 translated_by_item = prev_arr
-                done_prev = sum(1 for x in translated_by_item if x is not None)
-                logger.log(f"resumed from checkpoint: {done_prev}/{total_items} items done")
+                resumed = True
             else:
                 logger.log("checkpoint found but incompatible with current run config; starting fresh")
 
+    # The only full scan of translated_by_item; from here on the tracker counts per batch.
+    done = [x for x in items if translated_by_item[x["item_id"]] is not None]
+    progress = ProgressTracker(
+        total_items,
+        sum(len(x["text"]) for x in items),
+        done_items=len(done),
+        done_chars=sum(len(x["text"]) for x in done),
+    )
+    if resumed:
+        logger.log(f"resumed from checkpoint: {progress.done_items}/{total_items} items done")
+    live = TranslationMetrics(model=args.model or "")
+    live.add_file(in_path.name, progress)
+    if args.metrics_port:
+        serve_metrics(live, args.metrics_port, args.metrics_bind)
+        logger.log(f"metrics: http://{args.metrics_bind}:{args.metrics_port}/metrics")
+
+    def end_metrics(failed=False):
+        live.finish()
+        # Only a failed run lingers, so the last scrape can see translate_errors_total.
+        if failed and args.metrics_port and args.metrics_linger > 0:
+            logger.log(f"metrics: serving final values for {args.metrics_linger:g}s")
+            time.sleep(args.metrics_linger)
+
     def checkpoint():
-        processed = sum(1 for x in translated_by_item if x is not None)
-        state_obj = {
-            "version": 1,
-            "updated_at": now_iso(),
-            "run_sig": run_sig,
-            "processed_items": processed,
-            "translated_by_item": translated_by_item,
-        }
-        save_state(state_path, state_obj)
-        write_partial_output(dom, nodes, originals, node_item_ids, translated_by_item, out_path, enc)
+        with tracer.span("checkpoint"):
+            state_obj = {
+                "version": 1,
+                "updated_at": now_iso(),
+                "run_sig": run_sig,
+                "processed_items": progress.done_items,
+                "translated_by_item": translated_by_item,
+            }
+            save_state(state_path, state_obj)
+        write_partial_output(dom, nodes, originals, node_item_ids, translated_by_item, out_path, enc, tracer=tracer)
 
     try:
+        # Time the next batch has been ready but not sent: pending scan, progress log, previous checkpoint.
+        ready_at = time.perf_counter()
+        mid_taken = False
         for batch_idx, batch in enumerate(batches, start=1):
             pending = [x for x in batch if translated_by_item[x["item_id"]] is None]
             if not pending:
                 continue
             batch_texts = [x["text"] for x in pending]
-            processed_items = sum(1 for x in translated_by_item if x is not None)
             batch_chars = sum(len(x) for x in batch_texts)
-            elapsed = time.time() - started
-            avg_per_item = (elapsed / processed_items) if processed_items else 0
-            remaining_items = max(total_items - processed_items, 0)
-            eta = avg_per_item * remaining_items
-            pct = (processed_items / total_items * 100.0) if total_items else 100.0
             logger.log(
                 f"[batch {batch_idx}/{len(batches)}] "
-                f"{pct:5.1f}% | items={len(batch_texts)} | chars={batch_chars} | "
-                f"elapsed={format_seconds(elapsed)} | eta={format_seconds(eta)}"
+                f"{progress.pct:5.1f}% | items={len(batch_texts)} | chars={batch_chars} | "
+                f"elapsed={format_seconds(time.time() - started)} | eta={format_eta(progress.eta(), format_seconds)}"
             )
             batch_started = time.time()
-            batch_translated = run_codex_translate_batch(batch_texts, args.model)
+            queue_wait = time.perf_counter() - ready_at
+            stats = new_batch_stats()
+            live.batch_started()
+            try:
+                with tracer.span("backend", batch=batch_idx, items=len(batch_texts), chars=batch_chars):
+                    batch_translated = run_codex_translate_batch(
+                        batch_texts, args.model, stats=stats, tracer=tracer, log=logger.log
+                    )
+            except Exception as exc:
+                live.batch_failed()
+                logger.log(f"  !! batch {batch_idx} failed: {str(exc).splitlines()[0] if str(exc) else type(exc).__name__}")
+                end_metrics(failed=True)
+                raise
             for item, out_text in zip(pending, batch_translated):
                 translated_by_item[item["item_id"]] = out_text.strip()
-            processed_items = sum(1 for x in translated_by_item if x is not None)
-            total_elapsed = time.time() - started
-            done_pct = (processed_items / total_items * 100.0) if total_items else 100.0
-            avg_done = (total_elapsed / processed_items) if processed_items else 0
-            eta_done = avg_done * max(total_items - processed_items, 0)
+            progress.record(len(batch_texts), batch_chars)
+            live.batch_finished(stats["calls"] - 1, stats["mismatches"])
             logger.log(
-                f"  -> batch done {processed_items}/{total_items} ({done_pct:5.1f}%) | "
+                f"  -> batch done {progress.done_items}/{total_items} ({progress.pct:5.1f}%) | "
                 f"batch_time={format_seconds(time.time()-batch_started)} | "
-                f"elapsed={format_seconds(total_elapsed)} | eta={format_seconds(eta_done)}"
+                f"elapsed={format_seconds(time.time() - started)} | eta={format_eta(progress.eta(), format_seconds)}"
             )
+            checkpoint_started = time.perf_counter()
             checkpoint()
+            ready_at = time.perf_counter()
+            # First processed batch at or past the midpoint; a resumed run skips the finished ones.
+            if not mid_taken and batch_idx >= (len(batches) + 1) // 2:
+                profiler.snapshot("mid")
+                mid_taken = True
+            metrics.write(
+                {
+                    "ts": now_iso(),
+                    "file": in_path.name,
+                    "model": args.model or "",
+                    "batch": batch_idx,
+                    "batches": len(batches),
+                    "items": len(batch_texts),
+                    "chars": batch_chars,
+                    "queue_wait_s": round(queue_wait, 4),
+                    "spawn_s": round(stats["spawn_s"], 4),
+                    "backend_s": round(stats["backend_s"], 4),
+                    "parse_s": round(stats["parse_s"], 4),
+                    "retries": stats["calls"] - 1,
+                    "split_depth": stats["split_depth"],
+                    "mismatches": stats["mismatches"],
+                    "checkpoint_s": round(ready_at - checkpoint_started, 4),
+                    "batch_s": round(time.time() - batch_started, 4),
+                    "done": progress.done_items,
+                    "total": total_items,
+                }
+            )
     except KeyboardInterrupt:
         checkpoint()
         logger.log("interrupted: checkpoint and partial output saved")
         raise
 
-    for node_idx, node in enumerate(nodes):
-        item_ids = node_item_ids.get(node_idx, [])
-        if not item_ids:
-            continue
-        merged = " ".join((translated_by_item[item_id] or "").strip() for item_id in item_ids).strip()
-        if merged:
-            node.data = merged
-
-    rendered = dom.toxml()
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_bytes(encode_xml_text(rendered, enc))
+    write_final_output(dom, nodes, node_item_ids, translated_by_item, out_path, enc, tracer=tracer)
+    profiler.snapshot("end")
     total_elapsed = time.time() - started
     logger.log(f"written: {out_path}")
     logger.log(f"total elapsed: {format_seconds(total_elapsed)}")
-
-
-def format_seconds(sec):
-    sec = int(max(sec, 0))
-    h = sec // 3600
-    m = (sec % 3600) // 60
-    s = sec % 60
-    if h > 0:
-        return f"{h:02d}:{m:02d}:{s:02d}"
-    return f"{m:02d}:{s:02d}"
+    end_metrics()
 
 
 if __name__ == "__main__":
     try:
         main()
     except Exception as exc:
+        # Let the progress log catch up so the error is the last line on the terminal.
+        close_all()
         print(f"ERROR: {exc}", file=sys.stderr)
         sys.exit(1)